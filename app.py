@@ -1,20 +1,51 @@
 import os
 import json
 import csv
+import gzip
+import hashlib
+import io
+import itertools
+import random
+import re
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
+from urllib.parse import quote
 
 from flask import (
-    Flask, render_template, request, redirect,
-    url_for, flash, session
+    Flask, Response, render_template, request, redirect,
+    url_for, flash, stream_with_context
 )
 from flask_login import (
     LoginManager, UserMixin, login_user,
     logout_user, login_required, current_user
 )
-from openpyxl import load_workbook
+import click
+from openpyxl import Workbook, load_workbook
 import psycopg
+from psycopg_pool import ConnectionPool
 import requests
+from requests.adapters import HTTPAdapter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.platypus import Frame, Table, TableStyle
+from werkzeug.http import parse_accept_header
+import brotli
+
+from countries import country_code
+from jurisdictions import sanction_jurisdiction
+from sanctions_dataset import SANCTIONS_DATA
 
 
 SANCTION_DATASETS = {
@@ -38,6 +69,75 @@ app.secret_key = os.environ.get("SECRET_KEY", "changeme")
 
 DB_URL = os.environ.get("DATABASE_URL")
 OPEN_SANCTIONS_KEY = os.environ.get("OPEN_SANCTIONS_KEY")
+OPEN_SANCTIONS_URL = os.environ.get("OPEN_SANCTIONS_URL", "https://api.opensanctions.org")
+
+# Rows packed into one /match request (the hosted API caps a request at 100 queries)
+SCREEN_CHUNK_SIZE = max(1, min(int(os.environ.get("SCREEN_CHUNK_SIZE", "50")), 100))
+SCREEN_BATCH_TIMEOUT = int(os.environ.get("SCREEN_BATCH_TIMEOUT", "60"))
+
+# Postgres pool, per process (size max for gunicorn threads + screening workers)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+# Outbound screening: in-flight cap, plan quota (requests/sec + burst) and retries.
+# The token bucket is per process, so the plan quota is split evenly across
+# OPEN_SANCTIONS_PROCESSES: set it to the total of web workers, job workers
+# and rescreen processes that share one API key.
+SCREEN_CONCURRENCY = int(os.environ.get("SCREEN_CONCURRENCY", "8"))
+OPEN_SANCTIONS_PROCESSES = max(1, int(os.environ.get("OPEN_SANCTIONS_PROCESSES", "1")))
+OPEN_SANCTIONS_RATE = float(os.environ.get("OPEN_SANCTIONS_RATE", "5")) / OPEN_SANCTIONS_PROCESSES
+OPEN_SANCTIONS_BURST = max(1, int(os.environ.get("OPEN_SANCTIONS_BURST", "10")) // OPEN_SANCTIONS_PROCESSES)
+OPEN_SANCTIONS_RETRIES = int(os.environ.get("OPEN_SANCTIONS_RETRIES", "4"))
+
+# asgi.py: /api/screen connection caps (outbound keep-alive pool + async Postgres pool)
+ASYNC_HTTP_CONNECTIONS = int(os.environ.get("ASYNC_HTTP_CONNECTIONS", "100"))
+ASYNC_DB_POOL_MAX = int(os.environ.get("ASYNC_DB_POOL_MAX", "10"))
+
+# Uploaded rows are streamed into batch_rows this many at a time
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", "1000"))
+
+# Match result cache: in-process LRU in front of the match_cache table
+MATCH_SCOPE = "sanctions"
+CACHE_LRU_SIZE = int(os.environ.get("CACHE_LRU_SIZE", "10000"))
+DATASET_VERSION_TTL = int(os.environ.get("DATASET_VERSION_TTL", "900"))
+
+# "online" queries api.opensanctions.org; "offline" uses the local index
+SCREEN_MODE = os.environ.get("SCREEN_MODE", "online")
+OFFLINE_INDEX_PATH = os.environ.get("OFFLINE_INDEX_PATH", "sanctions_index.sqlite3")
+
+# Compiled candidate entities kept in memory, keyed by entity id
+CANDIDATE_CACHE_SIZE = int(os.environ.get("CANDIDATE_CACHE_SIZE", "50000"))
+
+# Full entity profiles served by /api/entity, kept in memory by entity id
+ENTITY_CACHE_SIZE = int(os.environ.get("ENTITY_CACHE_SIZE", "5000"))
+
+# JSON responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+# /metrics is open unless a bearer token is configured
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Results and batch listings are keyset-paginated
+RESULTS_PAGE_SIZE = int(os.environ.get("RESULTS_PAGE_SIZE", "100"))
+BATCHES_PAGE_SIZE = int(os.environ.get("BATCHES_PAGE_SIZE", "25"))
+RISK_LEVELS = {"High", "Clear", "Error"}
+
+# Raw OpenSanctions responses are only kept (compressed) when enabled
+RETAIN_RAW_RESPONSES = os.environ.get("RETAIN_RAW_RESPONSES", "0") == "1"
+RAW_RESPONSE_RETENTION_DAYS = int(os.environ.get("RAW_RESPONSE_RETENTION_DAYS", "30"))
+
+# Continuous re-screening when the sanctions dataset changes
+RESCREEN_POLL_INTERVAL = int(os.environ.get("RESCREEN_POLL_INTERVAL", "3600"))
+
+# Authenticated users kept in memory between requests
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "1000"))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "300"))
+
+# Background batch jobs
+WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "2"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS", "1800"))
 
 if not DB_URL:
     raise RuntimeError("DATABASE_URL missing")
@@ -45,6 +145,38 @@ if not DB_URL:
 DB_URL = DB_URL.replace("postgres://", "postgresql://")
 
 
+# =====================================================================
+# RESPONSE COMPRESSION
+# =====================================================================
+
+def compress_body(body, accept_encoding):
+    # Brotli when the client takes it, else gzip; tiny bodies are sent as-is
+    if len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = parse_accept_header(accept_encoding)
+    if accepted["br"]:
+        return brotli.compress(body, quality=5), "br"
+    if accepted["gzip"]:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+@app.after_request
+def compress_json(resp):
+    # Streamed responses (NDJSON, exports) are left alone so they still flush
+    if resp.mimetype != "application/json" or resp.is_streamed or resp.direct_passthrough:
+        return resp
+    if "Content-Encoding" in resp.headers:
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    body, encoding = compress_body(resp.get_data(), request.headers.get("Accept-Encoding", ""))
+    if encoding:
+        resp.set_data(body)
+        resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
 # =====================================================================
 # LOGIN
 # =====================================================================
@@ -54,6 +186,35 @@ login_manager.init_app(app)
 login_manager.login_view = "login"
 
 
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.data:
+                return None
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
 class User(UserMixin):
     def __init__(self, id_, email, school_name):
         self.id = id_
@@ -61,25 +222,323 @@ class User(UserMixin):
         self.school_name = school_name
 
 
+# load_user runs on every authenticated request; entries expire after
+# USER_CACHE_TTL so changes made by other workers are picked up
+user_cache = LRUCache(USER_CACHE_SIZE)
+
+
+def cache_user(user):
+    user_cache.set(str(user.id), (time.monotonic() + USER_CACHE_TTL, user))
+
+
+def forget_user(user_id):
+    # Call after changing a user's row (email, school, password)
+    user_cache.pop(str(user_id))
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    conn = psycopg.connect(DB_URL)
-    cur = conn.cursor()
-    cur.execute("SELECT id, email, school_name FROM users WHERE id=%s", (user_id,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    entry = user_cache.get(str(user_id))
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    with get_db() as (conn, cur):
+        cur.execute("SELECT id, email, school_name FROM users WHERE id=%s", (user_id,))
+        row = cur.fetchone()
+
+    if not row:
+        forget_user(user_id)
+        return None
+    user = User(*row)
+    cache_user(user)
+    return user
+
+
+# =====================================================================
+# METRICS
+# =====================================================================
 
-    return User(*row) if row else None
+# Per-process, Prometheus text format; scrape each gunicorn worker/worker process
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": [0] * len(HISTOGRAM_BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += seconds
+            hist["count"] += 1
+
+    def render(self, gauges=()):
+        def fmt(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+        lines, typed = [], set()
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{fmt(labels)} {value}")
+
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in zip(HISTOGRAM_BUCKETS, hist["buckets"]):
+                    lines.append(f"{name}_bucket{fmt(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{fmt(labels + (('le', '+Inf'),))} {hist['count']}")
+                lines.append(f"{name}_sum{fmt(labels)} {hist['sum']}")
+                lines.append(f"{name}_count{fmt(labels)} {hist['count']}")
+
+        for name, labels, value in gauges:
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{fmt(tuple(sorted(labels.items())))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def timed(stage, totals=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("pipeline_stage_seconds", elapsed, stage=stage)
+        if totals is not None:
+            totals[stage] = totals.get(stage, 0.0) + elapsed
+
+
+def timed_iter(iterable, stage, totals=None):
+    # Times only the work done inside the wrapped iterator (e.g. file parsing)
+    it = iter(iterable)
+    elapsed = 0.0
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.perf_counter() - started
+        yield item
+
+    metrics.observe("pipeline_stage_seconds", elapsed, stage=stage)
+    if totals is not None:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
 
 
 # =====================================================================
 # DB HELPERS
 # =====================================================================
 
+db_pool = ConnectionPool(
+    DB_URL,
+    min_size=DB_POOL_MIN,
+    max_size=DB_POOL_MAX,
+    timeout=DB_POOL_TIMEOUT,
+    max_idle=300,
+    check=ConnectionPool.check_connection,
+    name="parentcheck",
+    open=True,
+)
+
+
+@contextmanager
 def get_db():
-    conn = psycopg.connect(DB_URL)
-    return conn, conn.cursor()
+    # Commits on clean exit, rolls back on error, then returns the connection
+    started = time.perf_counter()
+    with db_pool.connection() as conn:
+        acquired = time.perf_counter()
+        metrics.observe("db_acquire_seconds", acquired - started)
+        try:
+            with conn.cursor() as cur:
+                yield conn, cur
+        finally:
+            metrics.observe("db_session_seconds", time.perf_counter() - acquired)
+
+
+@app.route("/api/db/stats")
+@login_required
+def db_stats():
+    return db_pool.get_stats()
+
+
+# =====================================================================
+# SCHEMA MIGRATIONS
+# =====================================================================
+
+# Applied in order, once each; users/batches/results predate this list.
+MIGRATIONS = [
+    ("001_jobs", """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id SERIAL PRIMARY KEY,
+            batch_id INTEGER NOT NULL UNIQUE REFERENCES batches(id) ON DELETE CASCADE,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload JSONB,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            worker TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claim_idx ON jobs (status, created_at);
+    """),
+    ("002_match_cache", """
+        CREATE TABLE IF NOT EXISTS match_cache (
+            cache_key TEXT PRIMARY KEY,
+            dataset_version TEXT NOT NULL,
+            results JSONB NOT NULL,
+            cached_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """),
+    ("003_batch_rows", """
+        CREATE TABLE IF NOT EXISTS batch_rows (
+            batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+            row_index INTEGER NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            country_of_citizenship TEXT NOT NULL,
+            dob TEXT NOT NULL,
+            PRIMARY KEY (batch_id, row_index)
+        );
+    """),
+    ("004_jobs_drop_payload", """
+        ALTER TABLE jobs DROP COLUMN IF EXISTS payload;
+    """),
+    ("005_delta_screening", """
+        ALTER TABLE batch_rows ADD COLUMN IF NOT EXISTS row_hash TEXT;
+        ALTER TABLE results ADD COLUMN IF NOT EXISTS row_hash TEXT;
+        ALTER TABLE batches ADD COLUMN IF NOT EXISTS dataset_version TEXT;
+        CREATE INDEX IF NOT EXISTS results_batch_hash_idx ON results (batch_id, row_hash);
+    """),
+    ("006_rescreening", """
+        CREATE TABLE IF NOT EXISTS dataset_versions (
+            scope TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            rescreened_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        CREATE TABLE IF NOT EXISTS monitor_hits (
+            id SERIAL PRIMARY KEY,
+            row_hash TEXT NOT NULL,
+            batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+            entity_id TEXT NOT NULL,
+            dataset_version TEXT NOT NULL,
+            match_data JSONB NOT NULL,
+            found_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            UNIQUE (row_hash, entity_id)
+        );
+        CREATE INDEX IF NOT EXISTS monitor_hits_batch_idx ON monitor_hits (batch_id, found_at DESC);
+    """),
+    ("007_compact_results", """
+        CREATE TABLE IF NOT EXISTS entities (
+            id TEXT PRIMARY KEY,
+            body JSONB NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        ALTER TABLE results ADD COLUMN IF NOT EXISTS entity_ids TEXT[];
+        ALTER TABLE results ALTER COLUMN raw_json DROP NOT NULL;
+        CREATE TABLE IF NOT EXISTS raw_responses (
+            batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+            row_hash TEXT NOT NULL,
+            payload BYTEA NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS raw_responses_batch_idx ON raw_responses (batch_id, row_hash);
+        CREATE INDEX IF NOT EXISTS raw_responses_created_idx ON raw_responses (created_at);
+    """),
+    ("008_listing_indexes", """
+        ALTER TABLE results ADD COLUMN IF NOT EXISTS id BIGSERIAL;
+        CREATE INDEX IF NOT EXISTS results_batch_id_idx ON results (batch_id, id);
+        CREATE INDEX IF NOT EXISTS results_batch_risk_idx ON results (batch_id, risk_level, id);
+        CREATE INDEX IF NOT EXISTS batches_user_uploaded_idx ON batches (user_id, uploaded_at DESC, id DESC);
+    """),
+    ("009_batch_timings", """
+        ALTER TABLE batches ADD COLUMN IF NOT EXISTS timings JSONB;
+    """),
+    ("010_country_codes", """
+        ALTER TABLE batch_rows ADD COLUMN IF NOT EXISTS country_code TEXT;
+    """),
+    ("011_jurisdictions", """
+        ALTER TABLE results ADD COLUMN IF NOT EXISTS jurisdictions TEXT[];
+        CREATE INDEX IF NOT EXISTS results_jurisdictions_idx ON results USING GIN (jurisdictions);
+    """),
+    ("012_monitor_hits_per_batch", """
+        ALTER TABLE monitor_hits DROP CONSTRAINT IF EXISTS monitor_hits_row_hash_entity_id_key;
+        ALTER TABLE monitor_hits ADD CONSTRAINT monitor_hits_batch_row_entity_key
+            UNIQUE (batch_id, row_hash, entity_id);
+    """),
+    ("013_job_heartbeat", """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+    """),
+    ("014_results_row_index", """
+        ALTER TABLE results ADD COLUMN IF NOT EXISTS row_index INTEGER;
+        UPDATE results r SET row_index = n.idx
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY batch_id ORDER BY id) - 1 AS idx
+            FROM results
+        ) n
+        WHERE n.id = r.id AND r.row_index IS NULL;
+        CREATE INDEX IF NOT EXISTS results_batch_row_idx ON results (batch_id, row_index);
+        CREATE INDEX IF NOT EXISTS results_batch_risk_row_idx ON results (batch_id, risk_level, row_index);
+    """),
+]
+
+
+def migrate():
+    with get_db() as (conn, cur):
+        # Serialise concurrent workers starting up at the same time; taken
+        # before any DDL so two processes never race to create the table
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('parentcheck_migrations'))")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("SELECT name FROM schema_migrations")
+        applied = {r[0] for r in cur.fetchall()}
+
+        for name, sql in MIGRATIONS:
+            if name in applied:
+                continue
+            cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+
+        conn.commit()
+
+
+@app.cli.command("migrate")
+def migrate_command():
+    migrate()
+
+
+if os.environ.get("AUTO_MIGRATE", "1") == "1":
+    migrate()
 
 
 # =====================================================================
@@ -90,13 +549,14 @@ def load_uploaded_file(file):
     name = file.filename.lower()
 
     if name.endswith(".csv"):
-        data = file.read().decode("utf-8", errors="ignore").splitlines()
-        return list(csv.reader(data))
+        # Decoded incrementally from the upload stream, one line at a time
+        data = io.TextIOWrapper(file.stream, encoding="utf-8", errors="ignore", newline="")
+        return csv.reader(data)
 
     if name.endswith(".xlsx"):
         wb = load_workbook(file, read_only=True)
         ws = wb.active
-        return [[str(c or "").strip() for c in row] for row in ws.iter_rows(values_only=True)]
+        return ([str(c or "").strip() for c in row] for row in ws.iter_rows(values_only=True))
 
     raise ValueError("Invalid file")
 
@@ -106,27 +566,771 @@ def load_uploaded_file(file):
 # =====================================================================
 
 def normalise_rows(rows):
-    if not rows:
-        return []
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
 
     # header detection
-    if any(ch.isalpha() for ch in "".join(rows[0])):
-        rows = rows[1:]
-
-    # drop empty rows
-    rows = [r for r in rows if any(cell.strip() for cell in r)]
+    if not any(ch.isalpha() for ch in "".join(first)):
+        rows = itertools.chain([first], rows)
 
-    clean = []
     for r in rows:
-        while len(r) < 4:
-            r.append("")
-        clean.append({
+        # drop empty rows
+        if not any(cell.strip() for cell in r):
+            continue
+        r = list(r) + [""] * (4 - len(r))
+        yield {
             "first_name": r[0].strip(),
             "last_name": r[1].strip(),
             "country_of_citizenship": r[2].strip(),
+            "country_code": country_code(r[2].strip()),
             "dob": r[3].strip(),
+        }
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+def row_hash(r):
+    fields = (r["first_name"], r["last_name"], r["country_of_citizenship"], r["dob"])
+    canonical = "|".join(" ".join(f.casefold().split()) for f in fields)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def store_batch_rows(cur, batch_id, rows):
+    # Bulk-loads rows with COPY; returns (preview, total)
+    preview = []
+    total = 0
+    with cur.copy("""
+        COPY batch_rows
+            (batch_id, row_index, first_name, last_name,
+             country_of_citizenship, country_code, dob, row_hash)
+        FROM STDIN
+    """) as copy:
+        for r in rows:
+            if len(preview) < 10:
+                preview.append(r)
+            copy.write_row((
+                batch_id, total, r["first_name"], r["last_name"],
+                r["country_of_citizenship"], r["country_code"], r["dob"], row_hash(r)
+            ))
+            total += 1
+    return preview, total
+
+
+def iter_batch_rows(batch_id, unscreened_only=False):
+    # Server-side cursor, so workers never hold more than one fetch in memory
+    sql = """
+        SELECT row_index, first_name, last_name, country_of_citizenship, country_code, dob, row_hash
+        FROM batch_rows br WHERE batch_id=%s
+    """
+    if unscreened_only:
+        sql += """
+            AND NOT EXISTS (
+                SELECT 1 FROM results r
+                WHERE r.batch_id = br.batch_id AND r.row_hash = br.row_hash
+            )
+        """
+
+    with db_pool.connection() as conn:
+        with conn.cursor(name=f"batch_rows_{batch_id}") as cur:
+            cur.itersize = UPLOAD_CHUNK_SIZE
+            cur.execute(sql + " ORDER BY row_index", (batch_id,))
+            for row in cur:
+                yield batch_row(*row)
+
+
+def batch_row(idx, f, l, c, code, d, h):
+    return {
+        "row_index": idx, "first_name": f, "last_name": l,
+        "country_of_citizenship": c, "country_code": code or country_code(c),
+        "dob": d, "row_hash": h
+    }
+
+
+def fetch_batch_rows(batch_id, after=-1, limit=SCREEN_CHUNK_SIZE):
+    # Keyset page of (row_index, row); holds a pooled connection only briefly
+    with get_db() as (conn, cur):
+        cur.execute("""
+            SELECT row_index, first_name, last_name, country_of_citizenship,
+                   country_code, dob, row_hash
+            FROM batch_rows
+            WHERE batch_id=%s AND row_index > %s
+            ORDER BY row_index
+            LIMIT %s
+        """, (batch_id, after, limit))
+        return [(row[0], batch_row(*row)) for row in cur.fetchall()]
+
+
+def user_owns_batch(batch_id, user_id):
+    with get_db() as (conn, cur):
+        cur.execute("SELECT 1 FROM batches WHERE id=%s AND user_id=%s", (batch_id, user_id))
+        owned = cur.fetchone() is not None
+    return owned
+
+
+# =====================================================================
+# SCREENING EXECUTOR
+# =====================================================================
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        # Takes a token and returns 0, or returns how long to wait for one
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while delay := self.take():
+            time.sleep(delay)
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+rate_limiter = TokenBucket(OPEN_SANCTIONS_RATE, OPEN_SANCTIONS_BURST)
+screen_executor = ThreadPoolExecutor(max_workers=SCREEN_CONCURRENCY, thread_name_prefix="screen")
+
+
+def retry_delay(resp, attempt):
+    retry_after = resp.headers.get("Retry-After") if resp is not None else None
+    if retry_after and retry_after.isdigit():
+        return int(retry_after)
+    return min(30, 0.5 * 2 ** attempt) + random.uniform(0, 0.5)
+
+
+class OpenSanctionsClient:
+    def __init__(self, base_url, api_key, pool_size):
+        self.base_url = base_url
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "errors": 0, "total_ms": 0.0, "last_ms": 0.0}
+
+        # One keep-alive pool shared by every screening thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"ApiKey {api_key}",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
         })
-    return clean
+
+    def record(self, path, status, elapsed_ms, retried=False, failed=False):
+        metrics.observe("opensanctions_request_seconds", elapsed_ms / 1000, endpoint=path)
+        metrics.inc("opensanctions_requests_total", endpoint=path, status=status)
+        if retried:
+            metrics.inc("opensanctions_retries_total", endpoint=path)
+
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["retries"] += int(retried)
+            self.stats["errors"] += int(failed)
+            self.stats["total_ms"] += elapsed_ms
+            self.stats["last_ms"] = elapsed_ms
+
+    def request(self, method, path, timeout, endpoint=None, **kwargs):
+        # endpoint labels stats and metrics; pass a fixed one for per-entity paths
+        endpoint = endpoint or path
+        for attempt in range(OPEN_SANCTIONS_RETRIES + 1):
+            rate_limiter.acquire()
+            last_attempt = attempt == OPEN_SANCTIONS_RETRIES
+            started = time.perf_counter()
+
+            try:
+                resp = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+            except requests.ConnectionError:
+                self.record(endpoint, "error", (time.perf_counter() - started) * 1000,
+                            retried=not last_attempt, failed=True)
+                if last_attempt:
+                    raise
+                time.sleep(retry_delay(None, attempt))
+                continue
+
+            retry = resp.status_code in RETRY_STATUSES and not last_attempt
+            self.record(endpoint, resp.status_code, (time.perf_counter() - started) * 1000,
+                        retried=retry, failed=resp.status_code >= 400)
+            if not retry:
+                return resp
+            time.sleep(retry_delay(resp, attempt))
+
+    def match(self, queries, timeout=12):
+        resp = self.request("POST", "/match/sanctions", timeout, json={"queries": queries})
+        resp.raise_for_status()
+        return resp.json()
+
+    def catalog(self):
+        resp = self.request("GET", "/catalog", 10)
+        resp.raise_for_status()
+        return resp.json()
+
+    def entity(self, entity_id, timeout=12):
+        resp = self.request("GET", f"/entities/{quote(entity_id, safe='')}", timeout, endpoint="/entities")
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+
+os_client = OpenSanctionsClient(OPEN_SANCTIONS_URL, OPEN_SANCTIONS_KEY, SCREEN_CONCURRENCY)
+
+
+@app.route("/api/opensanctions/stats")
+@login_required
+def opensanctions_stats():
+    with os_client.lock:
+        stats = dict(os_client.stats)
+    stats["avg_ms"] = stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+    return stats
+
+
+def submit_match(queries, timeout=12):
+    if SCREEN_MODE == "offline":
+        return screen_executor.submit(offline_match, queries)
+    return screen_executor.submit(cached_match, queries, timeout)
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return "Unauthorized", 401
+
+    gauges = [
+        (f"db_pool_{k}", {}, v) for k, v in db_pool.get_stats().items()
+    ] + [
+        ("match_cache_lookups_total", {"result": k}, v) for k, v in match_cache.stats.items()
+    ] + [
+        ("screen_executor_queue", {}, screen_executor._work_queue.qsize()),
+    ]
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+# =====================================================================
+# MATCH RESULT CACHE
+# =====================================================================
+
+def cache_key(query, scope=MATCH_SCOPE):
+    props = query.get("properties", {})
+
+    def norm(field):
+        values = props.get(field) or [""]
+        return " ".join(str(values[0]).casefold().split())
+
+    parts = [scope, norm("firstName"), norm("lastName"), norm("birthDate"), norm("country")]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class MatchCache:
+    def __init__(self, maxsize):
+        self.lru = LRUCache(maxsize)
+        self.lock = threading.Lock()
+        self.version = None
+        self.version_checked = 0
+        self.stats = {"lru_hits": 0, "db_hits": 0, "misses": 0, "coalesced": 0}
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+    def dataset_version(self):
+        # Entries are only valid for the dataset build they were matched against
+        now = time.monotonic()
+        if self.version and now - self.version_checked < DATASET_VERSION_TTL:
+            return self.version
+
+        try:
+            datasets = os_client.catalog().get("datasets", [])
+        except Exception:
+            return self.version
+
+        version = next(
+            (ds.get("version") for ds in datasets if ds.get("name") == MATCH_SCOPE),
+            None
+        )
+        self.version_checked = now
+
+        if version and version != self.version:
+            self.lru.clear()
+            with get_db() as (conn, cur):
+                cur.execute("DELETE FROM match_cache WHERE dataset_version <> %s", (version,))
+                conn.commit()
+            self.version = version
+
+        return self.version
+
+    def get_many(self, keys, version):
+        found = {}
+        for key in keys:
+            entry = self.lru.get(key)
+            if entry and entry[0] == version:
+                found[key] = entry[1]
+        self.count("lru_hits", len(found))
+
+        missing = [k for k in keys if k not in found]
+        if missing:
+            with get_db() as (conn, cur):
+                cur.execute("""
+                    SELECT cache_key, results FROM match_cache
+                    WHERE cache_key = ANY(%s) AND dataset_version=%s
+                """, (missing, version))
+                for key, results in cur.fetchall():
+                    found[key] = results
+                    self.lru.set(key, (version, results))
+                    self.count("db_hits")
+
+        self.count("misses", len(keys) - len(found))
+        return found
+
+    def put_many(self, items, version):
+        if not items:
+            return
+        for key, results in items.items():
+            self.lru.set(key, (version, results))
+
+        with get_db() as (conn, cur):
+            cur.executemany("""
+                INSERT INTO match_cache (cache_key, dataset_version, results)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (cache_key) DO UPDATE
+                SET dataset_version=EXCLUDED.dataset_version,
+                    results=EXCLUDED.results,
+                    cached_at=now()
+            """, [(key, version, json.dumps(results)) for key, results in items.items()])
+            conn.commit()
+
+
+match_cache = MatchCache(CACHE_LRU_SIZE)
+
+
+class SingleFlight:
+    # Identical lookups running on different threads share one outbound call
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def claim(self, keys):
+        owned, waiting = [], {}
+        with self.lock:
+            for key in keys:
+                if key in self.calls:
+                    waiting[key] = self.calls[key]
+                else:
+                    self.calls[key] = Future()
+                    owned.append(key)
+        return owned, waiting
+
+    def finish(self, keys, results=None, error=None):
+        with self.lock:
+            futures = [self.calls.pop(key) for key in keys]
+        for key, future in zip(keys, futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((results or {}).get(key))
+
+
+inflight = SingleFlight()
+
+
+def cached_match(queries, timeout=12):
+    version = match_cache.dataset_version()
+    keys = {qid: cache_key(q) for qid, q in queries.items()}
+    found = match_cache.get_many(list(set(keys.values())), version) if version else {}
+
+    # Duplicate rows collapse to one query per key, and keys another thread
+    # is already fetching are waited on rather than sent again
+    distinct = {}
+    for qid, key in keys.items():
+        if key not in found:
+            distinct.setdefault(key, queries[qid])
+    owned, waiting = inflight.claim(distinct)
+    match_cache.count("coalesced", sum(1 for key in keys.values() if key not in found) - len(owned))
+
+    if owned:
+        try:
+            os_json = os_client.match({key: distinct[key] for key in owned}, timeout)
+            fresh = os_json.get("responses", {})
+            results = {key: fresh[key]["results"] for key in owned if "results" in fresh.get(key, {})}
+        except Exception as e:
+            inflight.finish(owned, error=e)
+            raise
+        inflight.finish(owned, results)
+        found.update(results)
+        if version:
+            match_cache.put_many(results, version)
+
+    # No timeout here: the owning thread always resolves its futures once its
+    # own request timeouts and retries are exhausted
+    for key, future in waiting.items():
+        results = future.result()
+        if results is not None:
+            found[key] = results
+
+    return {
+        "responses": {
+            qid: {"results": found[key]}
+            for qid, key in keys.items() if key in found
+        }
+    }
+
+
+@app.route("/api/cache/stats")
+@login_required
+def cache_stats():
+    return {"dataset_version": match_cache.version, **match_cache.stats}
+
+
+# =====================================================================
+# MATCHING
+# =====================================================================
+
+class Candidate:
+    __slots__ = ("name_pairs", "birth_years", "birth_dates", "partial_years", "countries")
+
+    def __init__(self, props):
+        self.name_pairs = set()
+        for n in props.get("alias", []) + props.get("name", []):
+            tokens = name_tokens(n)
+            if len(tokens) >= 2:
+                self.name_pairs.add((tokens[0], tokens[-1]))
+
+        dates = [bd for bd in props.get("birthDate", []) if bd]
+        self.birth_years = {bd[:4] for bd in dates}
+        self.birth_dates = {(bd[:4], bd[5:7], bd[8:10]) for bd in dates if len(bd) >= 10}
+        self.partial_years = {bd[:4] for bd in dates if len(bd) < 10}
+
+        self.countries = {
+            c.casefold()
+            for c in props.get("nationality", []) + props.get("citizenship", [])
+        }
+
+
+def name_tokens(value):
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return [t for t in re.split(r"[^\w]+", value.casefold()) if t]
+
+
+candidate_cache = LRUCache(CANDIDATE_CACHE_SIZE)
+
+
+def compile_candidate(match):
+    # last_change moves whenever OpenSanctions edits the entity
+    key = (match.get("id"), match.get("last_change"))
+    candidate = candidate_cache.get(key) if key[0] else None
+    if candidate is None:
+        candidate = Candidate(match.get("properties", {}))
+        if key[0]:
+            candidate_cache.set(key, candidate)
+    return candidate
+
+
+def name_key(first, last):
+    first, last = name_tokens(first), name_tokens(last)
+    return (first[0], last[-1]) if first and last else None
+
+
+def parse_row_dob(user_dob):
+    # Parsed as the outbound query is; anything that isn't a full date never matches
+    iso = normalise_dob(user_dob)
+    return (iso[:4], iso[5:7], iso[8:10]) if iso else None
+
+
+def names_match(candidate, key):
+    return key in candidate.name_pairs
+
+
+def birth_year_matches(candidate, iso_dob):
+    if not iso_dob or not candidate.birth_years:
+        return True
+    return iso_dob[:4] in candidate.birth_years
+
+
+def dob_matches(candidate, row_dob):
+    if row_dob is None:
+        return False
+    return row_dob[0] in candidate.partial_years or row_dob in candidate.birth_dates
+
+
+def citizenship_matches(candidate, country):
+    # country is the row's ISO code (or casefolded text when it didn't resolve)
+    if not country:
+        return True
+    return country in candidate.countries
+
+
+# =====================================================================
+# SANCTIONS JURISDICTIONS
+# =====================================================================
+
+def sanction_value(s, field):
+    # Flat {"program": ...} entries, or nested Sanction entities
+    value = s.get(field, s.get("properties", {}).get(field))
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return value or None
+
+
+def entry_jurisdiction(s):
+    if not isinstance(s, dict):
+        return None
+    return (
+        sanction_jurisdiction(sanction_value(s, "program"))
+        or sanction_jurisdiction(sanction_value(s, "authority"))
+    )
+
+
+def match_jurisdictions(m):
+    found = {entry_jurisdiction(s) for s in m.get("properties", {}).get("sanctions", [])}
+    found.discard(None)
+    return sorted(found)
+
+
+# =====================================================================
+# OFFLINE SCREENING INDEX
+# =====================================================================
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"), "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+NAME_PROPS = ("name", "alias", "weakAlias", "previousName")
+
+
+def soundex(token):
+    letters = [ch for ch in token if "a" <= ch <= "z"]
+    if not letters:
+        return token
+    code = letters[0]
+    last = SOUNDEX_CODES.get(letters[0], "")
+    for ch in letters[1:]:
+        digit = SOUNDEX_CODES.get(ch, "")
+        if digit and digit != last:
+            code += digit
+        if ch not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def token_keys(token):
+    return {f"t:{token}", f"p:{soundex(token)}"}
+
+
+def entity_keys(entity):
+    props = entity.get("properties", {})
+    keys = set()
+
+    names = [n for prop in NAME_PROPS for n in props.get(prop, [])]
+    names += props.get("firstName", []) + props.get("lastName", [])
+    for n in names:
+        for token in name_tokens(n):
+            keys |= token_keys(token)
+
+    years = {bd[:4] for bd in props.get("birthDate", []) if bd[:4].isdigit()}
+    keys |= {f"y:{y}" for y in years} or {"y:none"}
+    return keys
+
+
+def build_offline_index(paths, index_path=OFFLINE_INDEX_PATH):
+    tmp_path = f"{index_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    db = sqlite3.connect(tmp_path, uri=True)
+    db.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE entities (id TEXT PRIMARY KEY, body TEXT NOT NULL);
+        CREATE TABLE keys (key TEXT NOT NULL, entity_id TEXT NOT NULL);
+        CREATE TABLE changes (entity_id TEXT PRIMARY KEY);
+    """)
+
+    count = 0
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as fh:
+            entities, keys = [], []
+            for line in fh:
+                entity = json.loads(line)
+                if entity.get("schema") != "Person":
+                    continue
+                if not SANCTION_DATASETS.intersection(entity.get("datasets", [])):
+                    continue
+
+                # last_change keys compiled candidates, so a rebuild invalidates them
+                body = {
+                    k: entity.get(k)
+                    for k in ("id", "schema", "caption", "datasets", "properties", "last_change")
+                }
+                entities.append((entity["id"], json.dumps(body)))
+                keys.extend((k, entity["id"]) for k in entity_keys(entity))
+
+                if len(entities) >= 5000:
+                    db.executemany("INSERT OR REPLACE INTO entities VALUES (?, ?)", entities)
+                    db.executemany("INSERT INTO keys VALUES (?, ?)", keys)
+                    count += len(entities)
+                    entities, keys = [], []
+
+            db.executemany("INSERT OR REPLACE INTO entities VALUES (?, ?)", entities)
+            db.executemany("INSERT INTO keys VALUES (?, ?)", keys)
+            count += len(entities)
+
+    # Entities added or edited since the previous build drive incremental re-screening
+    incremental = os.path.exists(index_path)
+    if incremental:
+        db.execute("ATTACH DATABASE ? AS prev", (f"file:{index_path}?mode=ro",))
+        db.execute("""
+            INSERT INTO changes
+            SELECT e.id FROM entities e
+            LEFT JOIN prev.entities p ON p.id = e.id
+            WHERE p.id IS NULL OR p.body <> e.body
+        """)
+        db.commit()
+        db.execute("DETACH DATABASE prev")
+
+    version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    db.execute("CREATE INDEX keys_key_idx ON keys (key, entity_id)")
+    db.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("version", version),
+        ("entities", str(count)),
+        ("incremental", "1" if incremental else "0"),
+    ])
+    db.commit()
+    db.close()
+
+    os.replace(tmp_path, index_path)
+    return count
+
+
+class OfflineIndex:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def version(self):
+        try:
+            row = self.db().execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+        return f"offline:{row[0]}" if row else None
+
+    def db(self):
+        # sqlite connections are per thread and read-only; reopen after a rebuild
+        mtime = os.path.getmtime(self.path)
+        if getattr(self.local, "mtime", None) != mtime:
+            if hasattr(self.local, "db"):
+                self.local.db.close()
+            self.local.db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self.local.mtime = mtime
+        return self.local.db
+
+    def changed_keys(self):
+        # Name blocking keys of entities changed since the previous build, or
+        # None when the index was built from scratch and anything may be new
+        db = self.db()
+        row = db.execute("SELECT value FROM meta WHERE key='incremental'").fetchone()
+        if not row or row[0] != "1":
+            return None
+        rows = db.execute("""
+            SELECT DISTINCT key FROM keys
+            WHERE entity_id IN (SELECT entity_id FROM changes) AND key NOT LIKE 'y:%'
+        """).fetchall()
+        return {r[0] for r in rows}
+
+    def candidates(self, first_tokens, last_tokens, year):
+        groups = [set().union(*map(token_keys, first_tokens)), set().union(*map(token_keys, last_tokens))]
+        if year:
+            groups.append({f"y:{year}", "y:none"})
+
+        selects = " INTERSECT ".join(
+            f"SELECT entity_id FROM keys WHERE key IN ({','.join('?' * len(g))})"
+            for g in groups
+        )
+        params = [k for g in groups for k in sorted(g)]
+        rows = self.db().execute(
+            f"SELECT body FROM entities WHERE id IN ({selects})", params
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def entity(self, entity_id):
+        try:
+            row = self.db().execute("SELECT body FROM entities WHERE id=?", (entity_id,)).fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+        return json.loads(row[0]) if row else None
+
+    def match(self, query):
+        props = query.get("properties", {})
+        first = name_tokens((props.get("firstName") or [""])[0])
+        last = name_tokens((props.get("lastName") or [""])[0])
+        if not first or not last:
+            return []
+
+        dob = (props.get("birthDate") or [""])[0]
+        year = "".join(ch for ch in dob if ch.isdigit())
+        year = dob[:4] if dob[:4].isdigit() else year[-4:] if len(year) == 8 else None
+
+        results = []
+        for entity in self.candidates(first, last, year):
+            results.append({**entity, "score": self.score(entity, first, last), "match": True})
+        results.sort(key=lambda m: m["score"], reverse=True)
+        return results
+
+    @staticmethod
+    def score(entity, first, last):
+        # 1.0 for an exact "first ... last" name, lower for phonetic-only hits
+        props = entity.get("properties", {})
+        names = [n for prop in NAME_PROPS for n in props.get(prop, [])]
+        best = 0.5
+        for n in names:
+            tokens = name_tokens(n)
+            if len(tokens) < 2:
+                continue
+            if tokens[0] == first[0] and tokens[-1] == last[-1]:
+                return 1.0
+            if soundex(tokens[0]) == soundex(first[0]) and soundex(tokens[-1]) == soundex(last[-1]):
+                best = 0.8
+        return best
+
+
+offline_index = OfflineIndex(OFFLINE_INDEX_PATH)
+
+
+def offline_match(queries):
+    results = {}
+    for q in queries.values():
+        key = cache_key(q)
+        if key not in results:
+            results[key] = offline_index.match(q)
+
+    return {
+        "responses": {
+            qid: {"status": 200, "results": results[cache_key(q)]}
+            for qid, q in queries.items()
+        }
+    }
+
+
+@app.cli.command("build-index")
+@click.argument("paths", nargs=-1, required=True)
+def build_index_command(paths):
+    count = build_offline_index(paths)
+    click.echo(f"Indexed {count} sanctioned persons into {OFFLINE_INDEX_PATH}")
 
 
 # =====================================================================
@@ -146,41 +1350,66 @@ def login():
         email = request.form.get("email", "").strip()
         password = request.form.get("password", "").strip()
 
-        conn, cur = get_db()
-        cur.execute("""
-            SELECT id, email, password, school_name
-            FROM users WHERE email=%s
-        """, (email,))
-        user = cur.fetchone()
-        cur.close()
-        conn.close()
+        with get_db() as (conn, cur):
+            cur.execute("""
+                SELECT id, email, password, school_name
+                FROM users WHERE email=%s
+            """, (email,))
+            user = cur.fetchone()
 
         if not user or password != user[2]:
             flash("Invalid credentials", "danger")
             return redirect("/login")
 
         uid, uemail, _, school = user
-        login_user(User(uid, uemail, school))
+        user = User(uid, uemail, school)
+        cache_user(user)
+        login_user(user)
         return redirect("/dashboard")
 
     return render_template("login.html")
 
 
+@app.route("/logout")
+@login_required
+def logout():
+    forget_user(current_user.id)
+    logout_user()
+    return redirect("/login")
+
+
 @app.route("/dashboard")
 @login_required
 def dashboard():
-    conn, cur = get_db()
-    cur.execute("""
-        SELECT id, filename, uploaded_at
-        FROM batches
-        WHERE user_id=%s
-        ORDER BY uploaded_at DESC
-    """, (current_user.id,))
-    batches = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    return render_template("dashboard.html", batches=batches)
+    # Keyset cursor: the (uploaded_at, id) of the last batch on the previous page
+    try:
+        before = datetime.fromisoformat(request.args.get("before", ""))
+    except ValueError:
+        before = None
+    before_id = request.args.get("before_id", type=int)
+    cursor_sql, params = "", [current_user.id]
+    if before and before_id:
+        cursor_sql = "AND (b.uploaded_at, b.id) < (%s, %s)"
+        params += [before, before_id]
+
+    with get_db() as (conn, cur):
+        cur.execute(f"""
+            SELECT b.id, b.filename, b.uploaded_at, j.status
+            FROM batches b
+            LEFT JOIN jobs j ON j.batch_id = b.id
+            WHERE b.user_id=%s {cursor_sql}
+            ORDER BY b.uploaded_at DESC, b.id DESC
+            LIMIT %s
+        """, params + [BATCHES_PAGE_SIZE + 1])
+        batches = cur.fetchall()
+
+    next_page = None
+    if len(batches) > BATCHES_PAGE_SIZE:
+        batches = batches[:BATCHES_PAGE_SIZE]
+        last = batches[-1]
+        next_page = {"before": last[2].isoformat(), "before_id": last[0]}
+
+    return render_template("dashboard.html", batches=batches, next_page=next_page)
 
 
 @app.route("/upload", methods=["GET", "POST"])
@@ -198,25 +1427,37 @@ def upload():
             flash("Invalid file")
             return render_template("upload.html")
 
-        rows_clean = normalise_rows(rows_raw)
-
-        conn, cur = get_db()
-        cur.execute("""
-            INSERT INTO batches (user_id, filename, preview_data, total_rows)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id
-        """, (
-            current_user.id,
-            file.filename,
-            json.dumps(rows_clean[:10]),
-            len(rows_clean)
-        ))
-        batch_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_db() as (conn, cur):
+            cur.execute("""
+                INSERT INTO batches (user_id, filename, preview_data, total_rows)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            """, (
+                current_user.id,
+                file.filename,
+                json.dumps([]),
+                0
+            ))
+            batch_id = cur.fetchone()[0]
+
+            totals = {}
+            try:
+                with timed("ingest", totals):
+                    rows = timed_iter(normalise_rows(rows_raw), "parse", totals)
+                    preview, total = store_batch_rows(cur, batch_id, rows)
+            except psycopg.Error:
+                raise
+            except Exception:
+                conn.rollback()
+                flash("Invalid file")
+                return render_template("upload.html")
+
+            upload_timings = {f"upload_{k}": round(v, 4) for k, v in totals.items()}
+            cur.execute("""
+                UPDATE batches SET preview_data=%s, total_rows=%s, timings=%s WHERE id=%s
+            """, (json.dumps(preview), total, json.dumps(upload_timings), batch_id))
+            conn.commit()
 
-        session[f"batch_{batch_id}_rows"] = rows_clean
         return redirect(f"/preview/{batch_id}")
 
     return render_template("upload.html")
@@ -225,14 +1466,12 @@ def upload():
 @app.route("/preview/<int:batch_id>")
 @login_required
 def preview(batch_id):
-    conn, cur = get_db()
-    cur.execute("""
-        SELECT filename, preview_data, total_rows
-        FROM batches WHERE id=%s
-    """, (batch_id,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    with get_db() as (conn, cur):
+        cur.execute("""
+            SELECT filename, preview_data, total_rows
+            FROM batches WHERE id=%s
+        """, (batch_id,))
+        row = cur.fetchone()
 
     if not row:
         flash("Batch not found")
@@ -252,96 +1491,133 @@ def preview(batch_id):
 @app.route("/processing/<int:batch_id>")
 @login_required
 def processing(batch_id):
-    rows = session.get(f"batch_{batch_id}_rows", [])
+    if not user_owns_batch(batch_id, current_user.id):
+        flash("Batch not found")
+        return redirect("/dashboard")
+
+    with get_db() as (conn, cur):
+        cur.execute("SELECT total_rows FROM batches WHERE id=%s", (batch_id,))
+        total = cur.fetchone()[0]
+
     return render_template(
         "processing.html",
-        rows_json=json.dumps(rows),
+        total=total,
         batch_id=batch_id
     )
 
 
 # =====================================================================
-# API SCREEN — FULL ENTITY PROFILE FOR EXPANDED VIEW
+# API SCREEN — COMPACT RESULT, FULL PROFILE ON DEMAND
 # =====================================================================
 
-@app.route("/api/screen", methods=["POST"])
-def api_screen():
-    data = request.json
-
-    first = data.get("first_name", "").strip()
-    last = data.get("last_name", "").strip()
-    raw_dob = data.get("dob", "").strip()
-
-    def normalise_dob(d):
-        if not d:
-            return None
-        d = d.replace("/", "-")
-        parts = d.split("-")
-        if len(parts) == 3:
-            dd, mm, yyyy = parts
-            return f"{yyyy}-{mm.zfill(2)}-{dd.zfill(2)}"
+def normalise_dob(d):
+    # ISO dates and datetimes (xlsx date cells arrive as "2001-05-03 00:00:00"),
+    # otherwise day-first d/m/y; None when the value isn't a full date
+    d = (d or "").strip().replace("/", "-").replace(".", "-")
+    if not d:
+        return None
+    try:
+        return datetime.fromisoformat(d).date().isoformat()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(d, "%d-%m-%Y").date().isoformat()
+    except ValueError:
         return None
 
-    dob = normalise_dob(raw_dob)
 
-    headers = {
-        "Authorization": f"ApiKey {OPEN_SANCTIONS_KEY}",
-        "Content-Type": "application/json",
-    }
+def screen_fields(data):
+    first = (data.get("first_name") or "").strip()
+    last = (data.get("last_name") or "").strip()
+    dob = normalise_dob((data.get("dob") or "").strip())
+    return first, last, dob
 
-    payload = {
-        "queries": {
-            "q": {
-                "schema": "Person",
-                "properties": {
-                    "firstName": [first],
-                    "lastName": [last]
-                }
-            }
+
+def screen_query(first, last, dob):
+    query = {
+        "schema": "Person",
+        "properties": {
+            "firstName": [first],
+            "lastName": [last]
         }
     }
 
     if dob:
-        payload["queries"]["q"]["properties"]["birthDate"] = [dob]
+        query["properties"]["birthDate"] = [dob]
+
+    return query
+
+
+@app.route("/api/screen", methods=["POST"])
+def api_screen():
+    first, last, dob = screen_fields(request.json)
 
     try:
-        resp = requests.post(
-            "https://api.opensanctions.org/match/sanctions",
-            headers=headers,
-            json=payload,
-            timeout=12
-        )
-        os_json = resp.json()
+        os_json = submit_match({"q": screen_query(first, last, dob)}).result()
     except Exception as e:
         return {"risk": "Error", "summary": str(e)}
 
     results = os_json.get("responses", {}).get("q", {}).get("results", [])
+    return evaluate_screen(first, last, dob, results)
 
-    # Matching helpers
-    def names_match(props):
-        aliases = props.get("alias", []) + props.get("name", [])
-        for a in aliases:
-            parts = a.lower().split()
-            if len(parts) >= 2 and parts[0] == first.lower() and parts[-1] == last.lower():
-                return True
-        return False
 
-    def dob_matches(u_dob, birth_dates):
-        if not u_dob:
-            return True
-        if not birth_dates:
-            return True
-        yyyy = u_dob[:4]
-        for bd in birth_dates:
-            if not bd:
-                continue
-            if len(bd) >= 10 and bd == u_dob:
-                return True
-            if bd[:4] == yyyy:
-                return True
-        return False
+@app.route("/api/screen/batch/<int:batch_id>")
+@login_required
+def api_screen_batch(batch_id):
+    if not user_owns_batch(batch_id, current_user.id):
+        return {"error": "Batch not found"}, 404
+
+    def emit(future, chunk):
+        try:
+            responses = future.result().get("responses", {})
+            error = None
+        except Exception as e:
+            responses, error = {}, str(e)
+
+        for idx, r, fields in chunk:
+            if error:
+                result = {"risk": "Error", "summary": error}
+            else:
+                results = responses.get(f"row{idx}", {}).get("results", [])
+                result = evaluate_screen(*fields, results)
+            yield json.dumps({"index": idx, **r, **result}) + "\n"
+
+    # Keep a bounded window of chunks in flight, as process_batch does, and
+    # emit one NDJSON line per row in whatever order the chunks come back.
+    # Rows are read a chunk at a time with short keyset queries, so no pooled
+    # connection is held across the stream. Chunks not yet started are
+    # cancelled if the client goes away.
+    def generate():
+        futures = {}
+        last = -1
+        try:
+            while page := fetch_batch_rows(batch_id, last, SCREEN_CHUNK_SIZE):
+                last = page[-1][0]
+                chunk = [(idx, r, screen_fields(r)) for idx, r in page]
+                queries = {f"row{idx}": screen_query(*fields) for idx, r, fields in chunk}
+                futures[submit_match(queries, SCREEN_BATCH_TIMEOUT)] = chunk
+
+                while len(futures) >= SCREEN_CONCURRENCY * 2:
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield from emit(future, futures.pop(future))
+
+            for future in as_completed(list(futures)):
+                yield from emit(future, futures.pop(future))
+        finally:
+            for future in futures:
+                future.cancel()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def evaluate_screen(first, last, dob, results):
+    key = name_key(first, last)
 
-    # Evaluate matches
     for m in results:
         props = m.get("properties", {})
         score = m.get("score", 0)
@@ -349,11 +1625,13 @@ def api_screen():
 
         if score != 1.0:
             continue
-        if not any(ds in SANCTION_DATASETS for ds in datasets):
+        if SANCTION_DATASETS.isdisjoint(datasets):
             continue
-        if not names_match(props):
+
+        candidate = compile_candidate(m)
+        if not names_match(candidate, key):
             continue
-        if not dob_matches(dob, props.get("birthDate", [])):
+        if not birth_year_matches(candidate, dob):
             continue
 
         # Clean sanctions entries
@@ -363,129 +1641,614 @@ def api_screen():
                 "program": s.get("program"),
                 "authority": s.get("authority"),
                 "listingDate": s.get("listingDate"),
-                "reason": (s.get("reason") or "Reason not provided")[:200]
+                "reason": (s.get("reason") or "Reason not provided")[:200],
+                "jurisdiction": entry_jurisdiction(s)
             })
 
-        # Full profile — send ALL fields
+        # The full profile is fetched from /api/entity when the row is expanded
+        if m.get("id"):
+            entity_cache.set(m["id"], entity_body(m))
+
         return {
             "risk": "Match",
             "summary": f"{first} {last} appears on sanctions lists",
+            "entity_id": m.get("id"),
             "datasets": datasets,
+            "jurisdictions": match_jurisdictions(m),
             "short_profile": props.get("summary", "")[:200],
 
             # sanctions table (frontend uses it)
-            "sanctions": sanctions,
-
-            # FULL PROPERTIES for dynamic OS-style sections
-            "props": props
+            "sanctions": sanctions
         }
 
 
     return {"risk": "Clear", "summary": "No sanctions match."}
 
 
+entity_cache = LRUCache(ENTITY_CACHE_SIZE)
+
+
+def load_entity(entity_id):
+    # Memory, then the entities table, then the index or API it came from
+    entity = entity_cache.get(entity_id)
+    if entity is not None:
+        return entity
+
+    with get_db() as (conn, cur):
+        cur.execute("SELECT body FROM entities WHERE id=%s", (entity_id,))
+        row = cur.fetchone()
+
+    if row:
+        entity = row[0]
+    else:
+        # No pooled connection is held during the outbound fetch
+        if SCREEN_MODE == "offline":
+            entity = offline_index.entity(entity_id)
+        else:
+            entity = os_client.entity(entity_id)
+        if entity is None:
+            return None
+        with get_db() as (conn, cur):
+            store_entities(cur, [{**entity, "id": entity_id}])
+            conn.commit()
+
+    entity = entity_body(entity)
+    entity_cache.set(entity_id, entity)
+    return entity
+
+
+@app.route("/api/entity/<path:entity_id>")
+@login_required
+def api_entity(entity_id):
+    try:
+        entity = load_entity(entity_id)
+    except requests.RequestException as e:
+        return {"error": str(e)}, 502
+
+    if entity is None:
+        return {"error": "Entity not found"}, 404
+
+    return {
+        "id": entity_id,
+        "caption": entity.get("caption"),
+        "schema": entity.get("schema"),
+        "datasets": entity.get("datasets", []),
+        "properties": entity.get("properties", {}),
+    }
+
+
 # =====================================================================
-# MAIN BATCH PROCESSOR (unchanged from prior version)
+# MAIN BATCH PROCESSOR
 # =====================================================================
 
-def process_batch(batch_id, rows):
-    API_KEY = os.environ.get("OPEN_SANCTIONS_KEY")
-    headers = {"Authorization": f"ApiKey {API_KEY}", "Content-Type": "application/json"}
+def build_person_query(r):
+    properties = {"firstName": [r["first_name"]], "lastName": [r["last_name"]]}
 
-    def dob_matches(user_dob, os_birth_dates):
-        digits = ''.join(ch for ch in user_dob if ch.isdigit())
-        if len(digits) != 8:
-            return False
-        dd, mm, yyyy = digits[:2], digits[2:4], digits[4:]
-        for bd in os_birth_dates:
-            if not bd:
-                continue
-            if bd[:4] != yyyy:
-                continue
-            if len(bd) < 10:
-                return True
-            if bd[8:10] == dd and bd[5:7] == mm:
-                return True
-        return False
+    # ISO, as /api/screen sends; left out when the DOB can't be parsed
+    dob = normalise_dob(r.get("dob"))
+    if dob:
+        properties["birthDate"] = [dob]
+    if r.get("country_code"):
+        properties["country"] = [r["country_code"]]
 
-    def citizenship_matches(country, props):
-        if not country:
-            return True
-        nat = props.get("nationality", []) + props.get("citizenship", [])
-        nat = [x.lower() for x in nat]
-        return country.lower() in nat
+    return {"schema": "Person", "properties": properties}
 
-    batch_results = []
 
-    for idx, r in enumerate(rows):
-        query_id = f"row{idx}"
-        properties = {"firstName": [r["first_name"]], "lastName": [r["last_name"]]}
+def row_true_matches(r, results_raw):
+    country = r.get("country_code") or (r.get("country_of_citizenship") or "").casefold()
+    row_dob = parse_row_dob(r.get("dob"))
+    true_matches = []
 
-        if r.get("dob"):
-            properties["birthDate"] = [r["dob"]]
-        if r.get("country_of_citizenship"):
-            properties["country"] = [r["country_of_citizenship"]]
+    for m in results_raw:
+        if m.get("score", 0) < 0.75:
+            continue
+        candidate = compile_candidate(m)
+        if not citizenship_matches(candidate, country):
+            continue
+        if not dob_matches(candidate, row_dob):
+            continue
+        true_matches.append(m)
 
-        payload = {"queries": {query_id: {"schema": "Person", "properties": properties}}}
+    return true_matches
 
-        try:
-            resp = requests.post(
-                "https://api.opensanctions.org/match/sanctions",
-                headers=headers,
-                json=payload,
-                timeout=12
+
+def carry_forward_results(batch_id, version, job=None):
+    # Reuse outcomes for rows already screened in the user's latest completed
+    # batch, provided that batch was screened against the same dataset version.
+    with get_db() as (conn, cur):
+        if job:
+            heartbeat(cur, *job)
+        cur.execute("UPDATE batches SET dataset_version=%s WHERE id=%s", (version, batch_id))
+        cur.execute("""
+            SELECT b.id FROM batches b
+            JOIN jobs j ON j.batch_id = b.id AND j.status = 'done'
+            WHERE b.user_id = (SELECT user_id FROM batches WHERE id=%s)
+              AND b.id <> %s
+              AND b.dataset_version = %s
+            ORDER BY b.uploaded_at DESC
+            LIMIT 1
+        """, (batch_id, batch_id, version))
+        prev = cur.fetchone()
+
+        copied = 0
+        if prev:
+            cur.execute("""
+                INSERT INTO results
+                    (batch_id, first_name, last_name, dob, country_of_citizenship,
+                     risk_level, match_data, entity_ids, jurisdictions, row_hash, row_index)
+                SELECT br.batch_id, br.first_name, br.last_name, br.dob,
+                       br.country_of_citizenship, p.risk_level, p.match_data,
+                       p.entity_ids, p.jurisdictions, br.row_hash, br.row_index
+                FROM batch_rows br
+                JOIN LATERAL (
+                    SELECT risk_level, match_data, entity_ids, jurisdictions FROM results
+                    WHERE batch_id=%s AND row_hash = br.row_hash AND risk_level <> 'Error'
+                    LIMIT 1
+                ) p ON true
+                WHERE br.batch_id=%s
+            """, (prev[0], batch_id))
+            copied = cur.rowcount
+        conn.commit()
+
+    return copied
+
+
+def current_dataset_version():
+    if SCREEN_MODE == "offline":
+        return offline_index.version()
+    return match_cache.dataset_version()
+
+
+def process_batch(batch_id, rows=None, job=None):
+    started = time.perf_counter()
+    totals = {}
+    counts = {"rows_screened": 0, "rows_carried": 0, "matches": 0, "errors": 0}
+
+    if rows is None:
+        with timed("dataset_version", totals):
+            version = current_dataset_version()
+        if version:
+            with timed("carry_forward", totals):
+                counts["rows_carried"] = carry_forward_results(batch_id, version, job)
+        rows = iter_batch_rows(batch_id, unscreened_only=bool(version))
+
+    def screen_chunk(chunk, future):
+        with timed("screen_wait", totals):
+            try:
+                os_json = future.result()
+                failed = False
+            except Exception:
+                os_json = {"error": "Failed OS request"}
+                failed = True
+                counts["errors"] += len(chunk)
+                metrics.inc("screen_errors_total", len(chunk))
+
+        responses = os_json.get("responses", {})
+        chunk_results = []
+
+        with timed("match", totals):
+            for idx, r in chunk:
+                results_raw = responses.get(f"row{idx}", {}).get("results", [])
+                true_matches = row_true_matches(r, results_raw)
+
+                # A failed request is never recorded (or carried forward) as Clear
+                risk = "Error" if failed else "High" if true_matches else "Clear"
+
+                chunk_results.append({
+                    "batch_id": batch_id,
+                    "first_name": r["first_name"],
+                    "last_name": r["last_name"],
+                    "dob": r["dob"],
+                    "country": r["country_of_citizenship"],
+                    "risk_level": risk,
+                    "match_data": true_matches,
+                    "raw_json": results_raw,
+                    "row_hash": r.get("row_hash") or row_hash(r),
+                    "row_index": r.get("row_index", idx)
+                })
+
+        matched = sum(1 for row in chunk_results if row["match_data"])
+        counts["rows_screened"] += len(chunk)
+        counts["matches"] += matched
+        metrics.inc("rows_screened_total", len(chunk))
+        metrics.inc("matches_total", matched)
+        return chunk_results
+
+    def persist(chunk_results):
+        with timed("persist", totals):
+            write_results(chunk_results, job)
+
+    # Keep a bounded window of chunks in flight and persist each as it lands
+    pending = deque()
+    for chunk in chunked(enumerate(rows), SCREEN_CHUNK_SIZE):
+        queries = {f"row{idx}": build_person_query(r) for idx, r in chunk}
+        pending.append((chunk, submit_match(queries, SCREEN_BATCH_TIMEOUT)))
+        if len(pending) >= SCREEN_CONCURRENCY * 2:
+            persist(screen_chunk(*pending.popleft()))
+
+    while pending:
+        persist(screen_chunk(*pending.popleft()))
+
+    totals["total"] = time.perf_counter() - started
+    save_batch_timings(batch_id, {**totals, **counts})
+
+
+def save_batch_timings(batch_id, timings):
+    timings = {k: round(v, 4) if isinstance(v, float) else v for k, v in timings.items()}
+    with get_db() as (conn, cur):
+        cur.execute("""
+            UPDATE batches SET timings = COALESCE(timings, '{}'::jsonb) || %s::jsonb
+            WHERE id=%s
+        """, (json.dumps(timings), batch_id))
+        conn.commit()
+
+
+def match_ref(m):
+    return {
+        "id": m.get("id"),
+        "caption": m.get("caption"),
+        "score": m.get("score"),
+        "datasets": m.get("datasets", []),
+        "jurisdictions": match_jurisdictions(m),
+    }
+
+
+# Per-query fields of a match result; the rest is the entity itself
+MATCH_ONLY_KEYS = {"score", "match", "features", "token", "explanations"}
+
+
+def entity_body(m):
+    return {k: v for k, v in m.items() if k not in MATCH_ONLY_KEYS}
+
+
+def store_entities(cur, matches):
+    # One row per OpenSanctions entity, rewritten only when its body changes
+    entities = {m["id"]: entity_body(m) for m in matches if m.get("id")}
+    if not entities:
+        return
+    cur.executemany("""
+        INSERT INTO entities (id, body) VALUES (%s, %s)
+        ON CONFLICT (id) DO UPDATE
+        SET body=EXCLUDED.body, updated_at=now()
+        WHERE entities.body IS DISTINCT FROM EXCLUDED.body
+    """, [(eid, json.dumps(m)) for eid, m in sorted(entities.items())])
+
+
+def write_results(batch_results, job=None):
+    with get_db() as (conn, cur):
+        if job:
+            heartbeat(cur, *job)
+        store_entities(cur, [m for row in batch_results for m in row["match_data"]])
+
+        with cur.copy("""
+            COPY results
+                (batch_id, first_name, last_name, dob, country_of_citizenship,
+                 risk_level, match_data, entity_ids, jurisdictions, row_hash, row_index)
+            FROM STDIN
+        """) as copy:
+            for row in batch_results:
+                refs = [match_ref(m) for m in row["match_data"]]
+                copy.write_row((
+                    row["batch_id"],
+                    row["first_name"],
+                    row["last_name"],
+                    row["dob"],
+                    row["country"],
+                    row["risk_level"],
+                    json.dumps(refs),
+                    [m["id"] for m in row["match_data"] if m.get("id")],
+                    sorted({j for ref in refs for j in ref["jurisdictions"]}),
+                    row["row_hash"],
+                    row.get("row_index"),
+                ))
+
+        if RETAIN_RAW_RESPONSES:
+            with cur.copy("COPY raw_responses (batch_id, row_hash, payload) FROM STDIN") as copy:
+                for row in batch_results:
+                    payload = zlib.compress(json.dumps(row["raw_json"]).encode("utf-8"))
+                    copy.write_row((row["batch_id"], row["row_hash"], payload))
+
+        conn.commit()
+
+
+def prune_raw_responses():
+    with get_db() as (conn, cur):
+        cur.execute("""
+            DELETE FROM raw_responses
+            WHERE created_at < now() - make_interval(days => %s)
+        """, (RAW_RESPONSE_RETENTION_DAYS,))
+        conn.commit()
+
+
+# =====================================================================
+# BACKGROUND JOBS
+# =====================================================================
+
+class JobSuperseded(Exception):
+    pass
+
+
+def heartbeat(cur, job_id, worker_name):
+    # Row-locks the job for the caller's transaction, so a worker whose job
+    # was reclaimed as stale can no longer write to the batch
+    cur.execute("""
+        UPDATE jobs SET heartbeat_at=now()
+        WHERE id=%s AND worker=%s AND status='running'
+    """, (job_id, worker_name))
+    if cur.rowcount == 0:
+        raise JobSuperseded(f"Job {job_id} is no longer held by {worker_name}")
+
+
+def enqueue_job(batch_id):
+    with get_db() as (conn, cur):
+        cur.execute("""
+            INSERT INTO jobs (batch_id)
+            VALUES (%s)
+            ON CONFLICT (batch_id) DO NOTHING
+        """, (batch_id,))
+        conn.commit()
+
+
+def claim_job(worker_name):
+    # Running jobs with no heartbeat for JOB_STALE_SECONDS belong to a dead
+    # worker; those already on their last attempt are failed rather than
+    # left running. Live workers beat after every persisted chunk.
+    with get_db() as (conn, cur):
+        cur.execute("""
+            UPDATE jobs
+            SET status='failed', finished_at=now(), error='Worker died on final attempt'
+            WHERE status='running' AND attempts >= %s
+              AND COALESCE(heartbeat_at, started_at) < now() - make_interval(secs => %s)
+        """, (JOB_MAX_ATTEMPTS, JOB_STALE_SECONDS))
+        cur.execute("""
+            UPDATE jobs
+            SET status='running', attempts=attempts+1, started_at=now(),
+                heartbeat_at=now(), worker=%s
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE attempts < %s
+                  AND (status='queued'
+                       OR (status='running'
+                           AND COALESCE(heartbeat_at, started_at) < now() - make_interval(secs => %s)))
+                ORDER BY created_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
             )
-            os_json = resp.json()
-        except Exception:
-            os_json = {"error": "Failed OS request"}
+            RETURNING id, batch_id
+        """, (worker_name, JOB_MAX_ATTEMPTS, JOB_STALE_SECONDS))
+        job = cur.fetchone()
+        conn.commit()
+    return job
+
+
+def finish_job(job_id, worker_name, error=None):
+    # A superseded worker leaves the job to whoever reclaimed it
+    with get_db() as (conn, cur):
+        if error is None:
+            cur.execute("""
+                UPDATE jobs SET status='done', error=NULL, finished_at=now()
+                WHERE id=%s AND worker=%s AND status='running'
+            """, (job_id, worker_name))
+        else:
+            cur.execute("""
+                UPDATE jobs
+                SET status=CASE WHEN attempts < %s THEN 'queued' ELSE 'failed' END,
+                    error=%s, finished_at=now()
+                WHERE id=%s AND worker=%s AND status='running'
+            """, (JOB_MAX_ATTEMPTS, error, job_id, worker_name))
+        conn.commit()
 
-        results_raw = os_json.get("responses", {}).get(query_id, {}).get("results", [])
-        true_matches = []
 
-        for m in results_raw:
-            score = m.get("score", 0)
-            props = m.get("properties", {})
-            if score < 0.75:
-                continue
-            if not citizenship_matches(r.get("country_of_citizenship"), props):
-                continue
-            if not dob_matches(r.get("dob"), props.get("birthDate", [])):
-                continue
-            true_matches.append(m)
+def run_job(job_id, batch_id, worker_name):
+    job = (job_id, worker_name)
+    try:
+        # A retried job must not duplicate rows written by the failed attempt
+        with get_db() as (conn, cur):
+            heartbeat(cur, *job)
+            cur.execute("DELETE FROM results WHERE batch_id=%s", (batch_id,))
+            conn.commit()
+
+        process_batch(batch_id, job=job)
+    except JobSuperseded:
+        app.logger.warning("Job %s for batch %s was reclaimed; abandoning it", job_id, batch_id)
+        return
+    except Exception as e:
+        app.logger.exception("Job %s for batch %s failed", job_id, batch_id)
+        metrics.inc("jobs_total", status="failed")
+        finish_job(job_id, worker_name, str(e)[:500])
+    else:
+        metrics.inc("jobs_total", status="done")
+        finish_job(job_id, worker_name)
+
+    if RETAIN_RAW_RESPONSES:
+        prune_raw_responses()
+
+
+@app.cli.command("worker")
+def worker_command():
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    app.logger.info("Screening worker %s started", worker_name)
+
+    while True:
+        job = claim_job(worker_name)
+        if not job:
+            time.sleep(WORKER_POLL_INTERVAL)
+            continue
+        run_job(*job, worker_name)
 
-        risk = "High" if true_matches else "Clear"
 
-        batch_results.append({
-            "batch_id": batch_id,
-            "first_name": r["first_name"],
-            "last_name": r["last_name"],
-            "dob": r["dob"],
-            "country": r["country_of_citizenship"],
-            "risk_level": risk,
-            "match_data": true_matches,
-            "raw_json": results_raw
-        })
+# =====================================================================
+# CONTINUOUS RE-SCREENING
+# =====================================================================
+
+def iter_monitored_persons():
+    # Latest stored result for every distinct person of each user, so a
+    # student uploaded by two schools is monitored for both
+    with db_pool.connection() as conn:
+        with conn.cursor(name="monitored_persons") as cur:
+            cur.itersize = UPLOAD_CHUNK_SIZE
+            cur.execute("""
+                SELECT DISTINCT ON (b.user_id, r.row_hash)
+                    r.row_hash, r.batch_id, r.first_name, r.last_name,
+                    r.country_of_citizenship, r.dob,
+                    COALESCE(r.entity_ids, ARRAY(
+                        SELECT jsonb_array_elements(r.match_data)->>'id'
+                    ))
+                FROM results r
+                JOIN batches b ON b.id = r.batch_id
+                WHERE r.row_hash IS NOT NULL
+                ORDER BY b.user_id, r.row_hash, r.batch_id DESC
+            """)
+            for h, batch_id, f, l, c, d, entity_ids in cur:
+                yield {
+                    "row_hash": h, "batch_id": batch_id,
+                    "first_name": f, "last_name": l,
+                    "country_of_citizenship": c, "country_code": country_code(c),
+                    "dob": d, "known_ids": set(entity_ids or []),
+                }
 
-    conn, cur = get_db()
-    for row in batch_results:
+
+def may_match_changes(person, changed_keys):
+    # Mirrors the offline index's blocking: both name parts must share a key
+    first = name_tokens(person["first_name"])
+    last = name_tokens(person["last_name"])
+    if not first or not last:
+        return False
+    first_keys = set().union(*map(token_keys, first))
+    last_keys = set().union(*map(token_keys, last))
+    return not changed_keys.isdisjoint(first_keys) and not changed_keys.isdisjoint(last_keys)
+
+
+def record_new_hits(chunk, future, version):
+    # Returns None when the chunk could not be screened
+    try:
+        responses = future.result().get("responses", {})
+    except Exception:
+        app.logger.exception("Re-screening chunk failed")
+        return None
+
+    hits, matches = [], []
+    for idx, person in chunk:
+        results_raw = responses.get(f"row{idx}", {}).get("results", [])
+        for m in row_true_matches(person, results_raw):
+            if m.get("id") and m["id"] not in person["known_ids"]:
+                matches.append(m)
+                hits.append((
+                    person["row_hash"], person["batch_id"], m["id"], version,
+                    json.dumps(match_ref(m))
+                ))
+
+    if hits:
+        with get_db() as (conn, cur):
+            store_entities(cur, matches)
+            cur.executemany("""
+                INSERT INTO monitor_hits (row_hash, batch_id, entity_id, dataset_version, match_data)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (batch_id, row_hash, entity_id) DO NOTHING
+            """, hits)
+            conn.commit()
+    return len(hits)
+
+
+def rescreen_all(version):
+    changed_keys = offline_index.changed_keys() if SCREEN_MODE == "offline" else None
+    persons = iter_monitored_persons()
+    if changed_keys is not None:
+        persons = (p for p in persons if may_match_changes(p, changed_keys))
+
+    screened = hits = failed = 0
+    pending = deque()
+
+    def record(chunk, future):
+        nonlocal hits, failed
+        found = record_new_hits(chunk, future, version)
+        if found is None:
+            failed += len(chunk)
+        else:
+            hits += found
+
+    for chunk in chunked(enumerate(persons), SCREEN_CHUNK_SIZE):
+        queries = {f"row{idx}": build_person_query(p) for idx, p in chunk}
+        pending.append((chunk, submit_match(queries, SCREEN_BATCH_TIMEOUT)))
+        screened += len(chunk)
+        if len(pending) >= SCREEN_CONCURRENCY * 2:
+            record(*pending.popleft())
+
+    while pending:
+        record(*pending.popleft())
+
+    return screened, hits, failed
+
+
+def rescreen_if_changed():
+    version = current_dataset_version()
+    if not version:
+        return False
+
+    with get_db() as (conn, cur):
+        cur.execute("SELECT version FROM dataset_versions WHERE scope=%s", (MATCH_SCOPE,))
+        row = cur.fetchone()
+    if row and row[0] == version:
+        return False
+
+    # The first run only records a baseline; stored results are already current
+    if row:
+        screened, hits, failed = rescreen_all(version)
+        app.logger.info("Re-screened %s persons against %s: %s new hits", screened, version, hits)
+        # Leave the old version in place so the next poll tries again
+        if failed:
+            app.logger.warning("%s persons could not be re-screened against %s", failed, version)
+            return False
+
+    with get_db() as (conn, cur):
         cur.execute("""
-            INSERT INTO results
-                (batch_id, first_name, last_name, dob, country_of_citizenship,
-                 risk_level, match_data, raw_json)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-        """, (
-            row["batch_id"],
-            row["first_name"],
-            row["last_name"],
-            row["dob"],
-            row["country"],
-            row["risk_level"],
-            json.dumps(row["match_data"]),
-            json.dumps(row["raw_json"]),
-        ))
-    conn.commit()
-    cur.close()
-    conn.close()
+            INSERT INTO dataset_versions (scope, version) VALUES (%s, %s)
+            ON CONFLICT (scope) DO UPDATE SET version=EXCLUDED.version, rescreened_at=now()
+        """, (MATCH_SCOPE, version))
+        conn.commit()
+    return True
+
+
+@app.cli.command("rescreen")
+@click.option("--once", is_flag=True, help="Check once and exit instead of polling.")
+def rescreen_command(once):
+    while True:
+        rescreen_if_changed()
+        if once:
+            break
+        time.sleep(RESCREEN_POLL_INTERVAL)
+
+
+@app.route("/api/monitor/hits")
+@login_required
+def monitor_hits():
+    with get_db() as (conn, cur):
+        cur.execute("""
+            SELECT h.batch_id, r.first_name, r.last_name, h.entity_id,
+                   h.dataset_version, h.found_at
+            FROM monitor_hits h
+            JOIN batches b ON b.id = h.batch_id
+            JOIN LATERAL (
+                SELECT first_name, last_name FROM results
+                WHERE batch_id = h.batch_id AND row_hash = h.row_hash
+                LIMIT 1
+            ) r ON true
+            WHERE b.user_id=%s
+            ORDER BY h.found_at DESC
+            LIMIT 200
+        """, (current_user.id,))
+        rows = cur.fetchall()
+
+    return {"hits": [
+        {
+            "batch_id": batch_id,
+            "name": f"{first} {last}",
+            "entity_id": entity_id,
+            "dataset_version": version,
+            "found_at": found_at.isoformat(),
+        }
+        for batch_id, first, last, entity_id, version, found_at in rows
+    ]}
 
 
 # =====================================================================
@@ -495,12 +2258,299 @@ def process_batch(batch_id, rows):
 @app.route("/finish/<int:batch_id>")
 @login_required
 def finish(batch_id):
-    rows = session.get(f"batch_{batch_id}_rows", [])
-    process_batch(batch_id, rows)
+    if not user_owns_batch(batch_id, current_user.id):
+        flash("Batch not found")
+        return redirect("/dashboard")
+
+    enqueue_job(batch_id)
     return redirect(f"/results/{batch_id}")
 
 
+@app.route("/api/batch/<int:batch_id>/status")
+@login_required
+def batch_status(batch_id):
+    with get_db() as (conn, cur):
+        cur.execute("""
+            SELECT j.status, j.attempts, j.error, j.created_at, j.started_at, j.finished_at
+            FROM jobs j
+            JOIN batches b ON b.id = j.batch_id
+            WHERE j.batch_id=%s AND b.user_id=%s
+        """, (batch_id, current_user.id))
+        row = cur.fetchone()
+
+    if not row:
+        return {"status": "not_found"}, 404
+
+    status, attempts, error, created, started, finished = row
+    return {
+        "status": status,
+        "attempts": attempts,
+        "error": error,
+        "created_at": created.isoformat(),
+        "started_at": started.isoformat() if started else None,
+        "finished_at": finished.isoformat() if finished else None,
+    }
+
+
+def results_filter(batch_id, risk=None, jurisdiction=None):
+    filter_sql, params = "", [batch_id]
+    if risk:
+        filter_sql += " AND risk_level=%s"
+        params.append(risk)
+    if jurisdiction:
+        filter_sql += " AND jurisdictions @> ARRAY[%s]"
+        params.append(jurisdiction)
+    return filter_sql, params
+
+
+def fetch_results_page(batch_id, risk=None, after=-1, limit=RESULTS_PAGE_SIZE, jurisdiction=None):
+    # Keyset pagination in roster order, served by (batch_id, [risk_level,] row_index);
+    # carried-forward rows are inserted first, so results.id is not roster order
+    filter_sql, params = results_filter(batch_id, risk, jurisdiction)
+
+    with get_db() as (conn, cur):
+        cur.execute(f"""
+            SELECT id, row_index, first_name, last_name, dob, country_of_citizenship,
+                   risk_level, match_data, jurisdictions
+            FROM results
+            WHERE batch_id=%s {filter_sql} AND row_index > %s
+            ORDER BY row_index
+            LIMIT %s
+        """, params + [after, limit + 1])
+        rows = cur.fetchall()
+
+    page = [
+        {
+            "id": rid,
+            "row_index": row_index,
+            "first_name": first,
+            "last_name": last,
+            "dob": dob,
+            "country_of_citizenship": country,
+            "risk_level": risk_level,
+            "jurisdictions": jurisdictions or [],
+            "matches": [
+                {"id": m.get("id"), "caption": m.get("caption"), "score": m.get("score")}
+                for m in match_data or []
+            ],
+        }
+        for rid, row_index, first, last, dob, country, risk_level, match_data, jurisdictions in rows[:limit]
+    ]
+    next_after = page[-1]["row_index"] if len(rows) > limit else None
+    return page, next_after
+
+
+def jurisdiction_counts(batch_id):
+    with get_db() as (conn, cur):
+        cur.execute("""
+            SELECT j, count(*) FROM results, unnest(jurisdictions) AS j
+            WHERE batch_id=%s
+            GROUP BY j
+            ORDER BY count(*) DESC, j
+        """, (batch_id,))
+        counts = cur.fetchall()
+    return counts
+
+
+def results_args():
+    risk = request.args.get("risk")
+    jurisdiction = request.args.get("jurisdiction")
+    after = request.args.get("after", -1, type=int)
+    return (
+        risk if risk in RISK_LEVELS else None,
+        jurisdiction if jurisdiction in SANCTIONS_DATA else None,
+        after,
+    )
+
+
 @app.route("/results/<int:batch_id>")
 @login_required
 def results(batch_id):
-    return redirect("/dashboard")
+    with get_db() as (conn, cur):
+        cur.execute("""
+            SELECT b.filename, b.total_rows, j.status
+            FROM batches b
+            LEFT JOIN jobs j ON j.batch_id = b.id
+            WHERE b.id=%s AND b.user_id=%s
+        """, (batch_id, current_user.id))
+        batch = cur.fetchone()
+
+    if not batch:
+        flash("Batch not found")
+        return redirect("/dashboard")
+
+    filename, total, status = batch
+    risk, jurisdiction, after = results_args()
+    page, next_after = fetch_results_page(batch_id, risk, after, jurisdiction=jurisdiction)
+
+    return render_template(
+        "results.html",
+        batch_id=batch_id,
+        filename=filename,
+        total=total,
+        status=status,
+        risk=risk,
+        jurisdiction=jurisdiction,
+        jurisdictions=jurisdiction_counts(batch_id),
+        results=page,
+        next_after=next_after
+    )
+
+
+@app.route("/api/results/<int:batch_id>")
+@login_required
+def api_results(batch_id):
+    if not user_owns_batch(batch_id, current_user.id):
+        return {"error": "Batch not found"}, 404
+
+    risk, jurisdiction, after = results_args()
+    limit = min(request.args.get("limit", RESULTS_PAGE_SIZE, type=int), 1000)
+    page, next_after = fetch_results_page(batch_id, risk, after, max(1, limit), jurisdiction)
+    return {"results": page, "next_after": next_after}
+
+
+@app.route("/api/results/<int:batch_id>/jurisdictions")
+@login_required
+def api_result_jurisdictions(batch_id):
+    if not user_owns_batch(batch_id, current_user.id):
+        return {"error": "Batch not found"}, 404
+
+    return {"jurisdictions": [{"jurisdiction": j, "count": n} for j, n in jurisdiction_counts(batch_id)]}
+
+
+@app.route("/results/<int:batch_id>/export")
+@login_required
+def export_results(batch_id):
+    if not user_owns_batch(batch_id, current_user.id):
+        flash("Batch not found")
+        return redirect("/dashboard")
+
+    risk, jurisdiction, _ = results_args()
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORTERS:
+        flash("Unknown export format")
+        return redirect(f"/results/{batch_id}")
+
+    # CSV is sent as rows are read. XLSX and PDF are assembled in a temp file
+    # first: memory stays flat, but the worker is busy for the whole build
+    # and the download only starts once the file is finished.
+    generate, mimetype = EXPORTERS[fmt]
+    return Response(
+        stream_with_context(generate(iter_export_rows(batch_id, risk, jurisdiction))),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=batch_{batch_id}_results.{fmt}"}
+    )
+
+
+# =====================================================================
+# EXPORT
+# =====================================================================
+
+EXPORT_HEADER = ["First name", "Last name", "DOB", "Country", "Risk", "Jurisdictions", "Matches"]
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def iter_export_rows(batch_id, risk=None, jurisdiction=None):
+    # Server-side cursor: rows reach the writer a fetch at a time
+    filter_sql, params = results_filter(batch_id, risk, jurisdiction)
+
+    with db_pool.connection() as conn:
+        with conn.cursor(name=f"export_{batch_id}") as cur:
+            cur.itersize = 2000
+            cur.execute(f"""
+                SELECT first_name, last_name, dob, country_of_citizenship,
+                       risk_level, jurisdictions, match_data
+                FROM results
+                WHERE batch_id=%s {filter_sql}
+                ORDER BY row_index
+            """, params)
+            for first, last, dob, country, risk_level, jurisdictions, match_data in cur:
+                matches = "; ".join(
+                    m.get("caption") or m.get("id") or "" for m in match_data or []
+                )
+                yield [first, last, dob, country, risk_level, "; ".join(jurisdictions or []), matches]
+
+
+def stream_file(fh):
+    fh.seek(0)
+    while chunk := fh.read(EXPORT_CHUNK_BYTES):
+        yield chunk
+    fh.close()
+
+
+def export_csv(rows):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_HEADER)
+    for chunk in chunked(rows, 1000):
+        writer.writerows(chunk)
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+
+def export_xlsx(rows):
+    # write_only keeps only the current row in memory; openpyxl spools sheet
+    # XML to disk and the finished file is streamed back from a temp file
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Results")
+    ws.append(EXPORT_HEADER)
+    for row in rows:
+        ws.append(row)
+
+    fh = tempfile.TemporaryFile()
+    wb.save(fh)
+    yield from stream_file(fh)
+
+
+def export_pdf(rows):
+    # Each page's table is built, drawn and discarded before the next one
+    page_size = landscape(A4)
+    margin = 15 * mm
+    col_widths = [30 * mm, 30 * mm, 22 * mm, 28 * mm, 16 * mm, 45 * mm, 96 * mm]
+    style = TableStyle([
+        ("FONT", (0, 0), (-1, -1), "Helvetica", 8),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 8),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#EEEEEE")),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ])
+
+    fh = tempfile.TemporaryFile()
+    c = pdf_canvas.Canvas(fh, pagesize=page_size, pageCompression=1)
+
+    def new_frame():
+        return Frame(margin, margin, page_size[0] - 2 * margin, page_size[1] - 2 * margin)
+
+    for page in chunked(rows, 30):
+        data = [EXPORT_HEADER] + [[str(v or "")[:90] for v in r] for r in page]
+        flowables = [Table(data, colWidths=col_widths, repeatRows=1, style=style)]
+        frame, fresh = new_frame(), True
+        while flowables:
+            remaining = len(flowables)
+            frame.addFromList(flowables, c)
+            if not flowables:
+                break
+            fresh = fresh and len(flowables) == remaining
+
+            # Didn't fit: split what's left across pages
+            parts = frame.split(flowables[0], c)
+            if len(parts) > 1:
+                flowables[:1] = parts
+            elif fresh:
+                # Never drop rows from an export
+                raise ValueError("Export rows do not fit on an empty PDF page")
+            else:
+                c.showPage()
+                frame, fresh = new_frame(), True
+        c.showPage()
+
+    c.save()
+    yield from stream_file(fh)
+
+
+EXPORTERS = {
+    "csv": (export_csv, "text/csv"),
+    "xlsx": (export_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": (export_pdf, "application/pdf"),
+}
@@ -0,0 +1,250 @@
+# ASGI entrypoint. POST /api/screen is served natively async so thousands of
+# in-flight screenings can share a few processes; every other path is handed
+# to the Flask app unchanged.
+#
+#     uvicorn asgi:application --workers 2
+
+import asyncio
+import json
+import time
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from psycopg_pool import AsyncConnectionPool
+
+import app as core
+
+
+# =====================================================================
+# ASYNC OPENSANCTIONS CLIENT
+# =====================================================================
+
+async def acquire_token():
+    # Draws from the same bucket as the Flask routes served by this process
+    while wait := core.rate_limiter.take():
+        await asyncio.sleep(wait)
+
+
+class AsyncOpenSanctionsClient:
+    def __init__(self, base_url, api_key, max_connections):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.client = None
+
+    async def open(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"ApiKey {self.api_key}"},
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def request(self, method, path, timeout, **kwargs):
+        # Same retry policy as the sync client; stats and metrics are shared
+        for attempt in range(core.OPEN_SANCTIONS_RETRIES + 1):
+            await acquire_token()
+            last_attempt = attempt == core.OPEN_SANCTIONS_RETRIES
+            started = time.perf_counter()
+
+            try:
+                resp = await self.client.request(method, path, timeout=timeout, **kwargs)
+            except httpx.TransportError:
+                core.os_client.record(path, "error", (time.perf_counter() - started) * 1000,
+                                      retried=not last_attempt, failed=True)
+                if last_attempt:
+                    raise
+                await asyncio.sleep(core.retry_delay(None, attempt))
+                continue
+
+            retry = resp.status_code in core.RETRY_STATUSES and not last_attempt
+            core.os_client.record(path, resp.status_code, (time.perf_counter() - started) * 1000,
+                                  retried=retry, failed=resp.status_code >= 400)
+            if not retry:
+                return resp
+            await asyncio.sleep(core.retry_delay(resp, attempt))
+
+    async def match(self, queries, timeout=12):
+        resp = await self.request("POST", "/match/sanctions", timeout, json={"queries": queries})
+        resp.raise_for_status()
+        return resp.json()
+
+
+os_client = AsyncOpenSanctionsClient(
+    core.OPEN_SANCTIONS_URL, core.OPEN_SANCTIONS_KEY, core.ASYNC_HTTP_CONNECTIONS
+)
+db_pool = AsyncConnectionPool(
+    core.DB_URL,
+    min_size=1,
+    max_size=core.ASYNC_DB_POOL_MAX,
+    timeout=core.DB_POOL_TIMEOUT,
+    max_idle=300,
+    name="parentcheck-async",
+    open=False,
+)
+
+
+# =====================================================================
+# ASYNC MATCH CACHE
+# =====================================================================
+
+version_lock = asyncio.Lock()
+
+
+def version_is_fresh(cache):
+    return cache.version and time.monotonic() - cache.version_checked < core.DATASET_VERSION_TTL
+
+
+async def dataset_version():
+    # The version check only blocks (catalog call) once per DATASET_VERSION_TTL,
+    # and concurrent requests that find it expired wait on a single refresh
+    cache = core.match_cache
+    if version_is_fresh(cache):
+        return cache.version
+    async with version_lock:
+        if version_is_fresh(cache):
+            return cache.version
+        return await asyncio.to_thread(cache.dataset_version)
+
+
+inflight = {}
+
+
+async def coalesced(key, fetch):
+    # Identical concurrent screenings await the same task; shielded so one
+    # caller disconnecting does not cancel it for the rest
+    task = inflight.get(key)
+    if task is None:
+        task = inflight[key] = asyncio.ensure_future(fetch())
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    else:
+        core.match_cache.count("coalesced")
+    return await asyncio.shield(task)
+
+
+async def fetch_and_store(key, query, version, timeout):
+    os_json = await os_client.match({"q": query}, timeout)
+    fresh = os_json.get("responses", {}).get("q", {})
+
+    if version and "results" in fresh:
+        core.match_cache.lru.set(key, (version, fresh["results"]))
+        async with db_pool.connection() as conn:
+            await conn.execute("""
+                INSERT INTO match_cache (cache_key, dataset_version, results)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (cache_key) DO UPDATE
+                SET dataset_version=EXCLUDED.dataset_version,
+                    results=EXCLUDED.results,
+                    cached_at=now()
+            """, (key, version, json.dumps(fresh["results"])))
+
+    return os_json
+
+
+async def cached_match(query, timeout=12):
+    # Single-query counterpart of core.cached_match sharing its LRU and table
+    version = await dataset_version()
+    key = core.cache_key(query)
+
+    if version:
+        entry = core.match_cache.lru.get(key)
+        if entry and entry[0] == version:
+            core.match_cache.count("lru_hits")
+            return {"responses": {"q": {"results": entry[1]}}}
+
+        async with db_pool.connection() as conn:
+            cur = await conn.execute("""
+                SELECT results FROM match_cache
+                WHERE cache_key=%s AND dataset_version=%s
+            """, (key, version))
+            row = await cur.fetchone()
+        if row:
+            core.match_cache.lru.set(key, (version, row[0]))
+            core.match_cache.count("db_hits")
+            return {"responses": {"q": {"results": row[0]}}}
+
+        core.match_cache.count("misses")
+
+    return await coalesced(key, lambda: fetch_and_store(key, query, version, timeout))
+
+
+async def screen(data):
+    first, last, dob = core.screen_fields(data)
+    query = core.screen_query(first, last, dob)
+
+    try:
+        if core.SCREEN_MODE == "offline":
+            os_json = await asyncio.to_thread(core.offline_match, {"q": query})
+        else:
+            os_json = await cached_match(query)
+    except Exception as e:
+        return {"risk": "Error", "summary": str(e)}
+
+    results = os_json.get("responses", {}).get("q", {}).get("results", [])
+    return core.evaluate_screen(first, last, dob, results)
+
+
+# =====================================================================
+# ASGI APP
+# =====================================================================
+
+flask_asgi = WsgiToAsgi(core.app)
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(scope, send, status, payload):
+    accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+    body, encoding = core.compress_body(json.dumps(payload).encode("utf-8"), accept_encoding)
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"vary", b"Accept-Encoding"),
+    ]
+    if encoding:
+        headers.append((b"content-encoding", encoding.encode()))
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await db_pool.open()
+            await os_client.open()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await os_client.close()
+            await db_pool.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    if scope["type"] == "http" and scope["path"] == "/api/screen" and scope["method"] == "POST":
+        try:
+            data = json.loads(await read_body(receive) or b"{}")
+        except ValueError:
+            return await send_json(scope, send, 400, {"error": "Invalid JSON"})
+        if not isinstance(data, dict):
+            return await send_json(scope, send, 400, {"error": "Invalid JSON"})
+        return await send_json(scope, send, 200, await screen(data))
+
+    return await flask_asgi(scope, receive, send)
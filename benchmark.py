@@ -0,0 +1,378 @@
+"""
+Screening pipeline benchmark.
+
+Runs load_uploaded_file -> normalise_rows -> store_batch_rows ->
+process_batch against a local stand-in for the OpenSanctions /match API
+and a throwaway Postgres, then reports rows/sec, per-row latency and
+peak RSS.
+
+    python benchmark.py --rows 1000 10000 --format csv --latency-ms 80
+
+Each roster size runs in its own process so peak RSS is per size. Pass
+--database-url to use an existing (disposable!) database instead of
+starting one with initdb/pg_ctl.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FIRST_NAMES = [
+    "James", "Mary", "Oliver", "Amelia", "Mohammed", "Fatima", "Wei", "Mei",
+    "Ivan", "Olga", "Luis", "Sofia", "Kwame", "Ama", "Arjun", "Priya",
+]
+LAST_NAMES = [
+    "Smith", "Jones", "Khan", "Li", "Petrov", "Garcia", "Mensah", "Patel",
+    "Brown", "Ivanova", "Nguyen", "Kim", "Hassan", "Silva", "Novak", "Cohen",
+]
+COUNTRIES = ["gb", "us", "ru", "cn", "in", "ng", "br", "ua", "fr", "de"]
+
+# Base tables the app's migrations build on
+BASE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        school_name TEXT
+    );
+    CREATE TABLE IF NOT EXISTS batches (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        filename TEXT,
+        preview_data JSONB,
+        total_rows INTEGER,
+        uploaded_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+    CREATE TABLE IF NOT EXISTS results (
+        batch_id INTEGER REFERENCES batches(id),
+        first_name TEXT,
+        last_name TEXT,
+        dob TEXT,
+        country_of_citizenship TEXT,
+        risk_level TEXT,
+        match_data JSONB,
+        raw_json JSONB
+    );
+"""
+
+
+# =====================================================================
+# MOCK OPENSANCTIONS
+# =====================================================================
+
+def parse_distribution(spec):
+    # "0:0.9,1:0.08,5:0.02" -> candidates per query and their weights
+    pairs = [p.split(":") for p in spec.split(",")]
+    return [int(n) for n, _ in pairs], [float(w) for _, w in pairs]
+
+
+def mock_entity(props, rng, exact):
+    first = props["firstName"][0] if exact else rng.choice(FIRST_NAMES)
+    last = props["lastName"][0] if exact else rng.choice(LAST_NAMES)
+    birth = f"{rng.randint(1940, 2000)}-01-01"
+    if exact and props.get("birthDate"):
+        # build_person_query already sends ISO dates, as entities use
+        birth = props["birthDate"][0]
+    entity_id = f"NK-{rng.getrandbits(40):x}"
+    return {
+        "id": entity_id,
+        "caption": f"{first} {last}",
+        "schema": "Person",
+        "score": 1.0 if exact else round(rng.uniform(0.5, 0.95), 2),
+        "datasets": ["us_ofac_sdn"],
+        "last_change": "2024-01-01T00:00:00",
+        "properties": {
+            "name": [f"{first} {last}"],
+            "alias": [f"{first[0]}. {last}"],
+            "birthDate": [birth],
+            "nationality": props.get("country", []),
+            "sanctions": [{"program": "OFAC – SDN List", "authority": "OFAC"}],
+        },
+    }
+
+
+def make_handler(latency_ms, jitter_ms, error_rate, distribution, hit_rate):
+    sizes, weights = distribution
+    rng = random.Random()
+    lock = threading.Lock()
+    # Fresh version per run so the persistent match cache starts cold
+    version = f"bench-{time.time_ns()}"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.reply(200, {"datasets": [{"name": "sanctions", "version": version}]})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+            with lock:
+                if rng.random() < error_rate:
+                    return self.reply(503, {"detail": "mock overload"})
+
+                responses = {}
+                for qid, query in body.get("queries", {}).items():
+                    n = rng.choices(sizes, weights)[0]
+                    results = [
+                        mock_entity(query["properties"], rng, rng.random() < hit_rate)
+                        for _ in range(n)
+                    ]
+                    responses[qid] = {"status": 200, "results": results, "total": {"value": n}}
+
+            self.reply(200, {"responses": responses})
+
+    return Handler
+
+
+@contextmanager
+def mock_opensanctions(args):
+    handler = make_handler(
+        args.latency_ms, args.jitter_ms, args.error_rate,
+        parse_distribution(args.results), args.hit_rate
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+
+# =====================================================================
+# SYNTHETIC ROSTERS
+# =====================================================================
+
+def synthetic_rows(n, seed=0):
+    rng = random.Random(seed)
+    yield ["First Name", "Last Name", "Country", "DOB"]
+    for _ in range(n):
+        yield [
+            rng.choice(FIRST_NAMES),
+            rng.choice(LAST_NAMES),
+            rng.choice(COUNTRIES),
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2005, 2019)}",
+        ]
+
+
+def write_roster(path, n, fmt):
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerows(synthetic_rows(n))
+        return
+
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for row in synthetic_rows(n):
+        ws.append(row)
+    wb.save(path)
+
+
+# =====================================================================
+# THROWAWAY POSTGRES
+# =====================================================================
+
+def find_pg_binary(name):
+    found = shutil.which(name)
+    if found:
+        return found
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    if not candidates:
+        sys.exit(f"{name} not found; install Postgres or pass --database-url")
+    return candidates[-1]
+
+
+@contextmanager
+def throwaway_postgres():
+    tmp = tempfile.mkdtemp(prefix="parentcheck-bench-")
+    data_dir = os.path.join(tmp, "data")
+    pg_ctl = find_pg_binary("pg_ctl")
+
+    subprocess.run(
+        [find_pg_binary("initdb"), "-D", data_dir, "-U", "postgres", "-A", "trust"],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    subprocess.run(
+        [pg_ctl, "-D", data_dir, "-w", "-l", os.path.join(tmp, "postgres.log"),
+         "-o", f"-k {tmp} -c listen_addresses='' -c fsync=off", "start"],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    try:
+        yield f"postgresql://postgres@/postgres?host={tmp}"
+    finally:
+        subprocess.run([pg_ctl, "-D", data_dir, "-m", "immediate", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# =====================================================================
+# BENCHMARK
+# =====================================================================
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_pipeline(args, roster_path):
+    import psycopg
+    from werkzeug.datastructures import FileStorage
+
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        conn.execute(BASE_SCHEMA)
+        user_id = conn.execute("""
+            INSERT INTO users (email, password, school_name)
+            VALUES (%s, 'bench', 'Benchmark School')
+            RETURNING id
+        """, (f"bench-{time.time_ns()}@example.invalid",)).fetchone()[0]
+
+    import app
+
+    # process_batch persists chunks in submission order, so the k-th
+    # write_results call completes the k-th submitted chunk
+    submitted = []
+    written = []
+    latencies = []
+    submit_match, write_results = app.submit_match, app.write_results
+
+    def timed_submit(queries, timeout=12):
+        submitted.append(time.perf_counter())
+        return submit_match(queries, timeout)
+
+    def timed_write(batch_results, job=None):
+        write_results(batch_results, job)
+        elapsed = time.perf_counter() - submitted[len(written)]
+        written.append(elapsed)
+        latencies.extend([elapsed] * len(batch_results))
+
+    app.submit_match, app.write_results = timed_submit, timed_write
+
+    timings = {}
+    started = time.perf_counter()
+
+    with open(roster_path, "rb") as fh:
+        upload = FileStorage(stream=fh, filename=os.path.basename(roster_path))
+        with app.get_db() as (conn, cur):
+            cur.execute("""
+                INSERT INTO batches (user_id, filename, preview_data, total_rows)
+                VALUES (%s, %s, '[]', 0) RETURNING id
+            """, (user_id, upload.filename))
+            batch_id = cur.fetchone()[0]
+            _, total = app.store_batch_rows(
+                cur, batch_id, app.normalise_rows(app.load_uploaded_file(upload))
+            )
+            cur.execute("UPDATE batches SET total_rows=%s WHERE id=%s", (total, batch_id))
+            conn.commit()
+    timings["ingest_s"] = time.perf_counter() - started
+
+    screen_started = time.perf_counter()
+    app.process_batch(batch_id)
+    timings["screen_s"] = time.perf_counter() - screen_started
+    timings["total_s"] = time.perf_counter() - started
+
+    with app.get_db() as (conn, cur):
+        cur.execute("SELECT count(*), count(*) FILTER (WHERE risk_level='High') FROM results WHERE batch_id=%s", (batch_id,))
+        stored, high = cur.fetchone()
+
+    return {
+        "rows": total,
+        "stored": stored,
+        "high": high,
+        "ingest_rows_per_s": round(total / timings["ingest_s"], 1) if timings["ingest_s"] else None,
+        "screen_rows_per_s": round(total / timings["screen_s"], 1) if timings["screen_s"] else None,
+        "total_rows_per_s": round(total / timings["total_s"], 1),
+        "p50_row_latency_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_row_latency_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "opensanctions": dict(app.os_client.stats),
+        **{k: round(v, 3) for k, v in timings.items()},
+    }
+
+
+def run_single(args):
+    with tempfile.TemporaryDirectory() as tmp, mock_opensanctions(args) as os_url:
+        roster_path = os.path.join(tmp, f"roster_{args.rows[0]}.{args.format}")
+        write_roster(roster_path, args.rows[0], args.format)
+
+        os.environ.update({
+            "OPEN_SANCTIONS_URL": os_url,
+            "OPEN_SANCTIONS_KEY": "bench",
+            "OPEN_SANCTIONS_RATE": str(args.rate),
+            "OPEN_SANCTIONS_BURST": str(max(1, int(args.rate))),
+            "SCREEN_MODE": "online",
+        })
+
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+            report = run_pipeline(args, roster_path)
+        else:
+            with throwaway_postgres() as db_url:
+                os.environ["DATABASE_URL"] = db_url
+                report = run_pipeline(args, roster_path)
+
+    print(json.dumps({"format": args.format, **report}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--results", default="0:0.85,1:0.1,5:0.05",
+                        help="candidates-per-query distribution, count:weight,...")
+    parser.add_argument("--hit-rate", type=float, default=0.02,
+                        help="chance a returned candidate exactly matches the query")
+    parser.add_argument("--rate", type=float, default=1000,
+                        help="OPEN_SANCTIONS_RATE for the run (requests/sec)")
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    if len(args.rows) == 1:
+        return run_single(args)
+
+    # One process per size so peak RSS isn't inherited from a larger run
+    base = list(sys.argv[1:])
+    rows_at = base.index("--rows") if "--rows" in base else None
+    if rows_at is not None:
+        end = rows_at + 1
+        while end < len(base) and not base[end].startswith("--"):
+            end += 1
+        del base[rows_at:end]
+
+    for n in args.rows:
+        subprocess.run([sys.executable, __file__, "--rows", str(n), *base], check=True)
+
+
+if __name__ == "__main__":
+    main()
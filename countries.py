@@ -0,0 +1,237 @@
+import re
+import unicodedata
+
+
+COUNTRY_NAMES = {
+    "ad": ["AND", "Andorra", "Andorran"],
+    "ae": ["ARE", "United Arab Emirates", "UAE", "Emirati", "Emirates"],
+    "af": ["AFG", "Afghanistan", "Afghan"],
+    "ag": ["ATG", "Antigua and Barbuda", "Antigua", "Antiguan"],
+    "al": ["ALB", "Albania", "Albanian"],
+    "am": ["ARM", "Armenia", "Armenian"],
+    "ao": ["AGO", "Angola", "Angolan"],
+    "ar": ["ARG", "Argentina", "Argentine", "Argentinian"],
+    "at": ["AUT", "Austria", "Austrian"],
+    "au": ["AUS", "Australia", "Australian"],
+    "az": ["AZE", "Azerbaijan", "Azerbaijani", "Azeri"],
+    "ba": ["BIH", "Bosnia and Herzegovina", "Bosnia", "Bosnian"],
+    "bb": ["BRB", "Barbados", "Barbadian", "Bajan"],
+    "bd": ["BGD", "Bangladesh", "Bangladeshi"],
+    "be": ["BEL", "Belgium", "Belgian"],
+    "bf": ["BFA", "Burkina Faso", "Burkinabe"],
+    "bg": ["BGR", "Bulgaria", "Bulgarian"],
+    "bh": ["BHR", "Bahrain", "Bahraini"],
+    "bi": ["BDI", "Burundi", "Burundian"],
+    "bj": ["BEN", "Benin", "Beninese"],
+    "bn": ["BRN", "Brunei", "Brunei Darussalam", "Bruneian"],
+    "bo": ["BOL", "Bolivia", "Bolivian"],
+    "br": ["BRA", "Brazil", "Brazilian"],
+    "bs": ["BHS", "Bahamas", "Bahamian"],
+    "bt": ["BTN", "Bhutan", "Bhutanese"],
+    "bw": ["BWA", "Botswana", "Motswana", "Batswana"],
+    "by": ["BLR", "Belarus", "Belarusian"],
+    "bz": ["BLZ", "Belize", "Belizean"],
+    "ca": ["CAN", "Canada", "Canadian"],
+    "cd": ["COD", "Democratic Republic of the Congo", "DR Congo", "DRC", "Congo-Kinshasa", "Congolese"],
+    "cf": ["CAF", "Central African Republic", "Central African"],
+    "cg": ["COG", "Republic of the Congo", "Congo", "Congo-Brazzaville"],
+    "ch": ["CHE", "Switzerland", "Swiss"],
+    "ci": ["CIV", "Ivory Coast", "Côte d'Ivoire", "Cote d'Ivoire", "Ivorian"],
+    "cl": ["CHL", "Chile", "Chilean"],
+    "cm": ["CMR", "Cameroon", "Cameroonian"],
+    "cn": ["CHN", "China", "People's Republic of China", "PRC", "Chinese"],
+    "co": ["COL", "Colombia", "Colombian"],
+    "cr": ["CRI", "Costa Rica", "Costa Rican"],
+    "cu": ["CUB", "Cuba", "Cuban"],
+    "cv": ["CPV", "Cape Verde", "Cabo Verde", "Cape Verdean"],
+    "cy": ["CYP", "Cyprus", "Cypriot"],
+    "cz": ["CZE", "Czech Republic", "Czechia", "Czech"],
+    "de": ["DEU", "Germany", "German"],
+    "dj": ["DJI", "Djibouti", "Djiboutian"],
+    "dk": ["DNK", "Denmark", "Danish", "Dane"],
+    "dm": ["DMA", "Dominica"],
+    "do": ["DOM", "Dominican Republic", "Dominican"],
+    "dz": ["DZA", "Algeria", "Algerian"],
+    "ec": ["ECU", "Ecuador", "Ecuadorian"],
+    "ee": ["EST", "Estonia", "Estonian"],
+    "eg": ["EGY", "Egypt", "Egyptian"],
+    "er": ["ERI", "Eritrea", "Eritrean"],
+    "es": ["ESP", "Spain", "Spanish", "Spaniard"],
+    "et": ["ETH", "Ethiopia", "Ethiopian"],
+    "fi": ["FIN", "Finland", "Finnish", "Finn"],
+    "fj": ["FJI", "Fiji", "Fijian"],
+    "fm": ["FSM", "Micronesia", "Micronesian"],
+    "fr": ["FRA", "France", "French"],
+    "ga": ["GAB", "Gabon", "Gabonese"],
+    "gb": [
+        "GBR", "United Kingdom", "UK", "Great Britain", "Britain", "British",
+        "United Kingdom of Great Britain and Northern Ireland",
+        "England", "English", "Scotland", "Scottish", "Wales", "Welsh",
+        "Northern Ireland", "Northern Irish",
+    ],
+    "gd": ["GRD", "Grenada", "Grenadian"],
+    "ge": ["GEO", "Georgia", "Georgian"],
+    "gh": ["GHA", "Ghana", "Ghanaian"],
+    "gm": ["GMB", "Gambia", "The Gambia", "Gambian"],
+    "gn": ["GIN", "Guinea", "Guinean"],
+    "gq": ["GNQ", "Equatorial Guinea", "Equatoguinean"],
+    "gr": ["GRC", "Greece", "Greek"],
+    "gt": ["GTM", "Guatemala", "Guatemalan"],
+    "gw": ["GNB", "Guinea-Bissau", "Bissau-Guinean"],
+    "gy": ["GUY", "Guyana", "Guyanese"],
+    "hk": ["HKG", "Hong Kong", "Hong Konger", "Hongkonger"],
+    "hn": ["HND", "Honduras", "Honduran"],
+    "hr": ["HRV", "Croatia", "Croatian", "Croat"],
+    "ht": ["HTI", "Haiti", "Haitian"],
+    "hu": ["HUN", "Hungary", "Hungarian"],
+    "id": ["IDN", "Indonesia", "Indonesian"],
+    "ie": ["IRL", "Ireland", "Republic of Ireland", "Irish"],
+    "il": ["ISR", "Israel", "Israeli"],
+    "in": ["IND", "India", "Indian"],
+    "iq": ["IRQ", "Iraq", "Iraqi"],
+    "ir": ["IRN", "Iran", "Islamic Republic of Iran", "Iranian"],
+    "is": ["ISL", "Iceland", "Icelandic", "Icelander"],
+    "it": ["ITA", "Italy", "Italian"],
+    "jm": ["JAM", "Jamaica", "Jamaican"],
+    "jo": ["JOR", "Jordan", "Jordanian"],
+    "jp": ["JPN", "Japan", "Japanese"],
+    "ke": ["KEN", "Kenya", "Kenyan"],
+    "kg": ["KGZ", "Kyrgyzstan", "Kyrgyz", "Kirghiz"],
+    "kh": ["KHM", "Cambodia", "Cambodian"],
+    "ki": ["KIR", "Kiribati", "I-Kiribati"],
+    "km": ["COM", "Comoros", "Comoran", "Comorian"],
+    "kn": ["KNA", "Saint Kitts and Nevis", "Kittitian", "Nevisian"],
+    "kp": ["PRK", "North Korea", "Democratic People's Republic of Korea", "DPRK", "North Korean"],
+    "kr": ["KOR", "South Korea", "Republic of Korea", "Korea", "South Korean", "Korean"],
+    "kw": ["KWT", "Kuwait", "Kuwaiti"],
+    "kz": ["KAZ", "Kazakhstan", "Kazakh", "Kazakhstani"],
+    "la": ["LAO", "Laos", "Lao", "Laotian"],
+    "lb": ["LBN", "Lebanon", "Lebanese"],
+    "lc": ["LCA", "Saint Lucia", "Saint Lucian"],
+    "li": ["LIE", "Liechtenstein", "Liechtensteiner"],
+    "lk": ["LKA", "Sri Lanka", "Sri Lankan"],
+    "lr": ["LBR", "Liberia", "Liberian"],
+    "ls": ["LSO", "Lesotho", "Basotho", "Mosotho"],
+    "lt": ["LTU", "Lithuania", "Lithuanian"],
+    "lu": ["LUX", "Luxembourg", "Luxembourgish", "Luxembourger"],
+    "lv": ["LVA", "Latvia", "Latvian"],
+    "ly": ["LBY", "Libya", "Libyan"],
+    "ma": ["MAR", "Morocco", "Moroccan"],
+    "mc": ["MCO", "Monaco", "Monegasque", "Monacan"],
+    "md": ["MDA", "Moldova", "Republic of Moldova", "Moldovan"],
+    "me": ["MNE", "Montenegro", "Montenegrin"],
+    "mg": ["MDG", "Madagascar", "Malagasy"],
+    "mh": ["MHL", "Marshall Islands", "Marshallese"],
+    "mk": ["MKD", "North Macedonia", "Macedonia", "Macedonian"],
+    "ml": ["MLI", "Mali", "Malian"],
+    "mm": ["MMR", "Myanmar", "Burma", "Burmese"],
+    "mn": ["MNG", "Mongolia", "Mongolian"],
+    "mo": ["MAC", "Macau", "Macao", "Macanese"],
+    "mr": ["MRT", "Mauritania", "Mauritanian"],
+    "mt": ["MLT", "Malta", "Maltese"],
+    "mu": ["MUS", "Mauritius", "Mauritian"],
+    "mv": ["MDV", "Maldives", "Maldivian"],
+    "mw": ["MWI", "Malawi", "Malawian"],
+    "mx": ["MEX", "Mexico", "Mexican"],
+    "my": ["MYS", "Malaysia", "Malaysian"],
+    "mz": ["MOZ", "Mozambique", "Mozambican"],
+    "na": ["NAM", "Namibia", "Namibian"],
+    "ne": ["NER", "Niger", "Nigerien"],
+    "ng": ["NGA", "Nigeria", "Nigerian"],
+    "ni": ["NIC", "Nicaragua", "Nicaraguan"],
+    "nl": ["NLD", "Netherlands", "Holland", "Dutch"],
+    "no": ["NOR", "Norway", "Norwegian"],
+    "np": ["NPL", "Nepal", "Nepali", "Nepalese"],
+    "nr": ["NRU", "Nauru", "Nauruan"],
+    "nz": ["NZL", "New Zealand", "New Zealander", "Kiwi"],
+    "om": ["OMN", "Oman", "Omani"],
+    "pa": ["PAN", "Panama", "Panamanian"],
+    "pe": ["PER", "Peru", "Peruvian"],
+    "pg": ["PNG", "Papua New Guinea", "Papua New Guinean"],
+    "ph": ["PHL", "Philippines", "Filipino", "Filipina", "Philippine"],
+    "pk": ["PAK", "Pakistan", "Pakistani"],
+    "pl": ["POL", "Poland", "Polish", "Pole"],
+    "ps": ["PSE", "Palestine", "State of Palestine", "Palestinian"],
+    "pt": ["PRT", "Portugal", "Portuguese"],
+    "pw": ["PLW", "Palau", "Palauan"],
+    "py": ["PRY", "Paraguay", "Paraguayan"],
+    "qa": ["QAT", "Qatar", "Qatari"],
+    "ro": ["ROU", "Romania", "Romanian"],
+    "rs": ["SRB", "Serbia", "Serbian", "Serb"],
+    "ru": ["RUS", "Russia", "Russian Federation", "Russian"],
+    "rw": ["RWA", "Rwanda", "Rwandan"],
+    "sa": ["SAU", "Saudi Arabia", "Saudi", "Saudi Arabian"],
+    "sb": ["SLB", "Solomon Islands", "Solomon Islander"],
+    "sc": ["SYC", "Seychelles", "Seychellois"],
+    "sd": ["SDN", "Sudan", "Sudanese"],
+    "se": ["SWE", "Sweden", "Swedish", "Swede"],
+    "sg": ["SGP", "Singapore", "Singaporean"],
+    "si": ["SVN", "Slovenia", "Slovenian", "Slovene"],
+    "sk": ["SVK", "Slovakia", "Slovak", "Slovakian"],
+    "sl": ["SLE", "Sierra Leone", "Sierra Leonean"],
+    "sm": ["SMR", "San Marino", "Sammarinese"],
+    "sn": ["SEN", "Senegal", "Senegalese"],
+    "so": ["SOM", "Somalia", "Somali"],
+    "sr": ["SUR", "Suriname", "Surinamese"],
+    "ss": ["SSD", "South Sudan", "South Sudanese"],
+    "st": ["STP", "Sao Tome and Principe", "São Tomé and Príncipe", "Santomean"],
+    "sv": ["SLV", "El Salvador", "Salvadoran", "Salvadorian"],
+    "sy": ["SYR", "Syria", "Syrian Arab Republic", "Syrian"],
+    "sz": ["SWZ", "Eswatini", "Swaziland", "Swazi"],
+    "td": ["TCD", "Chad", "Chadian"],
+    "tg": ["TGO", "Togo", "Togolese"],
+    "th": ["THA", "Thailand", "Thai"],
+    "tj": ["TJK", "Tajikistan", "Tajik", "Tajikistani"],
+    "tl": ["TLS", "Timor-Leste", "East Timor", "Timorese"],
+    "tm": ["TKM", "Turkmenistan", "Turkmen"],
+    "tn": ["TUN", "Tunisia", "Tunisian"],
+    "to": ["TON", "Tonga", "Tongan"],
+    "tr": ["TUR", "Turkey", "Türkiye", "Turkiye", "Turkish"],
+    "tt": ["TTO", "Trinidad and Tobago", "Trinidadian", "Tobagonian"],
+    "tv": ["TUV", "Tuvalu", "Tuvaluan"],
+    "tw": ["TWN", "Taiwan", "Republic of China", "Taiwanese"],
+    "tz": ["TZA", "Tanzania", "Tanzanian"],
+    "ua": ["UKR", "Ukraine", "Ukrainian"],
+    "ug": ["UGA", "Uganda", "Ugandan"],
+    "us": ["USA", "United States", "United States of America", "US", "America", "American"],
+    "uy": ["URY", "Uruguay", "Uruguayan"],
+    "uz": ["UZB", "Uzbekistan", "Uzbek", "Uzbekistani"],
+    "va": ["VAT", "Vatican City", "Holy See", "Vatican"],
+    "vc": ["VCT", "Saint Vincent and the Grenadines", "Vincentian"],
+    "ve": ["VEN", "Venezuela", "Venezuelan"],
+    "vn": ["VNM", "Vietnam", "Viet Nam", "Vietnamese"],
+    "vu": ["VUT", "Vanuatu", "Ni-Vanuatu"],
+    "ws": ["WSM", "Samoa", "Samoan"],
+    "xk": ["XKX", "Kosovo", "Kosovar", "Kosovan"],
+    "ye": ["YEM", "Yemen", "Yemeni"],
+    "za": ["ZAF", "South Africa", "South African"],
+    "zm": ["ZMB", "Zambia", "Zambian"],
+    "zw": ["ZWE", "Zimbabwe", "Zimbabwean"],
+}
+
+
+def country_key(value):
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(ch for ch in value if not unicodedata.combining(ch)).casefold()
+    value = re.sub(r"['.’]", "", value)
+    value = re.sub(r"\W+", " ", value).strip()
+    return value[4:] if value.startswith("the ") else value
+
+
+def build_country_index():
+    # ISO alpha-2/alpha-3 codes, names and demonyms -> alpha-2 (as OpenSanctions uses)
+    index = {}
+    for code, names in COUNTRY_NAMES.items():
+        index[code] = code
+        for name in names:
+            index.setdefault(country_key(name), code)
+    return index
+
+
+COUNTRY_INDEX = build_country_index()
+
+
+def country_code(value):
+    if not value:
+        return None
+    return COUNTRY_INDEX.get(country_key(value))
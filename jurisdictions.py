@@ -0,0 +1,85 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from countries import COUNTRY_NAMES, country_key
+from sanctions_dataset import SANCTIONS_DATA
+
+
+JURISDICTION_STOPWORDS = {
+    "the", "of", "and", "for", "on", "in", "to", "no", "list", "lists",
+    "sanction", "sanctions", "national", "domestic",
+}
+
+# Programmes often name the country they target ("Special Economic Measures
+# – Burma"), which says nothing about who imposed them
+COUNTRY_TOKENS = {
+    token for names in COUNTRY_NAMES.values() for name in names[1:]
+    for token in country_key(name).split()
+}
+
+
+def programme_tokens(value):
+    return {
+        t for t in country_key(value).split()
+        if t not in JURISDICTION_STOPWORDS and t not in COUNTRY_TOKENS
+    }
+
+
+def authority_key(value):
+    # "OFAC – SDN List": the authority is the part before the dash
+    return country_key(re.split(r"\s[–-]\s", value)[0])
+
+
+@lru_cache(maxsize=None)
+def jurisdiction_index():
+    # Built on first use from SANCTIONS_DATA: exact programme/authority ->
+    # jurisdiction, plus token -> jurisdictions for partial matches
+    exact, prefixes, tokens = {}, defaultdict(set), defaultdict(set)
+    for jurisdiction, programmes in SANCTIONS_DATA.items():
+        for programme in programmes:
+            exact.setdefault(country_key(programme), jurisdiction)
+            prefixes[authority_key(programme)].add(jurisdiction)
+            for token in programme_tokens(programme):
+                tokens[token].add(jurisdiction)
+
+    authorities = {key: next(iter(owners)) for key, owners in prefixes.items() if len(owners) == 1}
+    for key, jurisdiction in authorities.items():
+        exact.setdefault(key, jurisdiction)
+    return exact, authorities, dict(tokens)
+
+
+@lru_cache(maxsize=4096)
+def sanction_jurisdiction(value):
+    if not value:
+        return None
+    exact, authorities, tokens = jurisdiction_index()
+    key = country_key(value)
+    if key in exact:
+        return exact[key]
+
+    # A known authority before the dash, or leading the name ("Special
+    # Economic Measures Act"); the longest one wins
+    authority = authority_key(value)
+    if authority in authorities:
+        return authorities[authority]
+    leading = [a for a in authorities if key.startswith(a + " ")]
+    if leading:
+        return authorities[max(leading, key=len)]
+
+    # Partial match: rarer tokens weigh more, the winner must cover most of
+    # the query's tokens, and ties stay unassigned
+    query = programme_tokens(value)
+    scores, hits = defaultdict(float), defaultdict(int)
+    for token in query:
+        owners = tokens.get(token, ())
+        if 0 < len(owners) <= 3:
+            for j in owners:
+                scores[j] += 1 / len(owners)
+                hits[j] += 1
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    if not ranked or ranked[0][1] < 1 or hits[ranked[0][0]] * 2 <= len(query):
+        return None
+    if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+        return None
+    return ranked[0][0]
@@ -0,0 +1,36 @@
+import pytest
+
+from jurisdictions import sanction_jurisdiction
+from sanctions_dataset import SANCTIONS_DATA
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("OFAC – SDN List", "United States"),
+    ("OFAC", "United States"),
+    ("OFAC – New Programme", "United States"),
+    ("HM Treasury", "United Kingdom"),
+    ("Special Economic Measures – Burma", "Canada"),
+    ("Special Economic Measures Act", "Canada"),
+    ("UNSC Resolution 1518 – Iraq", "United Nations"),
+])
+def test_programme_and_authority(value, expected):
+    assert sanction_jurisdiction(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    "VENEZUELA", "BURMA", "ZIMBABWE", "China", "Tunisia", "Ukraine", "Iraq",
+])
+def test_targeted_country_is_not_a_jurisdiction(value):
+    assert sanction_jurisdiction(value) is None
+
+
+@pytest.mark.parametrize("value", [None, "", "Unknown programme"])
+def test_unknown_values(value):
+    assert sanction_jurisdiction(value) is None
+
+
+def test_every_listed_programme_maps_to_a_listing_jurisdiction():
+    for jurisdiction, programmes in SANCTIONS_DATA.items():
+        for programme in programmes:
+            owners = {j for j, ps in SANCTIONS_DATA.items() if programme in ps}
+            assert sanction_jurisdiction(programme) in owners, programme